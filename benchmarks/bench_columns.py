@@ -0,0 +1,61 @@
+"""Compare `columns` against rebuilding the frame with `drop`/`join` on a wide DataFrame
+
+Usage: python benchmarks/bench_columns.py [n_columns] [n_rows] [n_selected]
+
+Reports the time per call and the peak memory allocated during a call (which, for
+`columns`, should be proportional to the selected columns only).
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+import tracemalloc
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from mymltoolkit import columns
+from mymltoolkit.component import component
+
+
+@component
+def double(df: pd.DataFrame, **extra: Any) -> pd.DataFrame:
+    return df * 2
+
+
+def peak(func: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(n_columns: int = 10_000, n_rows: int = 1_000, n_selected: int = 10) -> None:
+    df = pd.DataFrame(
+        np.random.default_rng(0).random((n_rows, n_columns)),
+        columns=[f"c{i}" for i in range(n_columns)],
+    )
+    selected = list(df.columns[:: n_columns // n_selected][:n_selected])
+    task = columns(double(), selected).to_task().compile()
+
+    def join() -> pd.DataFrame:
+        """The implementation before columns were written back in place"""
+        return df.drop(columns=selected).join(df[selected] * 2)
+
+    assert task(df)[selected].equals(join()[selected])
+
+    print(f"{n_rows} rows, {n_columns} columns, {n_selected} selected")
+    print(f"frame:   {df.memory_usage().sum() / 1e6:10.1f} MB")
+    for name, func in (("join", join), ("columns", lambda: task(df))):
+        number = 20
+        seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+        megabytes = peak(func) / 1e6
+        print(f"{name + ':':8} {seconds * 1e3:10.3f} ms/call {megabytes:10.1f} MB peak")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
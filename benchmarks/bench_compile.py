@@ -0,0 +1,96 @@
+"""Compare the compiled `Task` plan against walking the `ComponentList` on every call
+
+Usage: python benchmarks/bench_compile.py [n_stages] [n_calls]
+
+The walk reproduces the code before execution plans: components linked to the next
+one, and a logging level looked up on `mymltoolkit` for every stage. Logging is
+disabled in both cases.
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from loguru import logger
+
+import mymltoolkit as mlt
+from mymltoolkit.component import Component, _logger, component
+
+
+@component
+def increment(a: int = 0, **extra: Any) -> int:
+    return a + 1
+
+
+@dataclass
+class Node:
+    """A stage linked to the next one, like `Component` before execution plans"""
+
+    func: Callable
+    next: Node | None = None
+
+
+class LinkedList:
+    """`ComponentList` as it was before execution plans"""
+
+    def __init__(self, components: Iterable[Component]):
+        nodes = [Node(component.func) for component in components]
+        for node, following in zip(nodes, nodes[1:]):
+            node.next = following
+        self.first = nodes[0]
+
+    def __iter__(self) -> Iterator[Node]:
+        yield self.first
+        current = self.first
+        while current.next:
+            yield current.next
+            current = current.next
+
+
+def info(message: str, *, indent: int = 2, _level: int = 0, **kwargs: Any) -> None:
+    """`_info` as it was before execution plans"""
+    if (mlt._LOGGING_LEVEL != -1) and (_level > mlt._LOGGING_LEVEL):
+        return
+
+    _logger.info("{indent}" + message, indent=" " * indent * _level, **kwargs)
+
+
+def walk(components: LinkedList, *args: Any, indent: int = 2, _level: int = 0) -> Any:
+    """`Task.__call__` as it was before execution plans"""
+    for stage in components:
+        info("Running {component}", component=stage, indent=indent, _level=_level)
+
+        if not isinstance(args, Iterable):
+            args = (args,)
+
+        args = stage.func(*args, indent=indent, _level=_level + 1)
+
+    return args
+
+
+def main(n_stages: int = 10, n_calls: int = 100_000) -> None:
+    components = increment()
+    for _ in range(n_stages - 1):
+        components = components | increment()
+    task = components.to_task().compile()
+    linked = LinkedList(task.components)
+
+    mlt._LOGGING_LEVEL = -1  # Its default, checked by `info` before calling the logger
+    logger.disable(__name__)  # Like mymltoolkit, which the records came from
+    assert walk(linked, 0) == task(0) == n_stages
+
+    walked = timeit.timeit(lambda: walk(linked, 0), number=n_calls)
+    compiled = timeit.timeit(lambda: task(0), number=n_calls)
+
+    print(f"{n_stages} stages, {n_calls} calls")
+    print(f"walk:     {walked / n_calls * 1e6:8.3f} us/call")
+    print(f"compiled: {compiled / n_calls * 1e6:8.3f} us/call")
+    print(f"speedup:  {walked / compiled:8.2f}x")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
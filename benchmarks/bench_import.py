@@ -0,0 +1,36 @@
+"""Time `import mymltoolkit.component` in fresh interpreters against a fixed budget
+
+Usage: python benchmarks/bench_import.py [budget_seconds] [repeat]
+
+Exits with status 1 if the fastest import exceeds the budget.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+
+CODE = """
+import time
+start = time.perf_counter()
+import mymltoolkit.component
+print(time.perf_counter() - start)
+"""
+
+
+def main(budget: float = 0.5, repeat: int = 5) -> int:
+    timings = [
+        float(subprocess.check_output([sys.executable, "-c", CODE], text=True))
+        for _ in range(repeat)
+    ]
+
+    best = min(timings)
+    print(
+        f"import mymltoolkit.component: {best * 1e3:.1f} ms "
+        f"(budget {budget * 1e3:.0f} ms)"
+    )
+    return int(best > budget)
+
+
+if __name__ == "__main__":
+    sys.exit(main(*(t(arg) for t, arg in zip((float, int), sys.argv[1:]))))
@@ -0,0 +1,251 @@
+"""Benchmark suite for dispatch overhead, meta component fan-out and sklearn wrappers
+
+Usage: python benchmarks/suite.py [--quick] [--output FILE] [--compare BASELINE]
+    [--threshold FRACTION] [--filter SUBSTRING]
+
+Every case times the pipeline against a hand-written equivalent (plain function calls,
+or `sklearn.pipeline.Pipeline` for estimators), so that the overhead of the toolkit can
+be told apart from the work itself. Results are written as JSON; with `--compare`, the
+suite exits with status 1 if any timing is slower than the baseline by more than
+`--threshold` (a fraction, 0.25 by default). Everything runs offline on synthetic data.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+from collections.abc import Callable, Iterator
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, StandardScaler
+
+import mymltoolkit
+from mymltoolkit import agg, columns, each, multi
+from mymltoolkit.component import Task, component, sklearn_component
+
+# name -> factory taking `quick` and yielding (variant, zero-argument callable)
+CASES: dict[str, Callable[[bool], Iterator[tuple[str, Callable[[], Any]]]]] = {}
+
+
+def case(name: str) -> Callable:
+    def register(factory: Callable) -> Callable:
+        CASES[name] = factory
+        return factory
+
+    return register
+
+
+@component
+def increment(a: int = 0, **extra: Any) -> int:
+    return a + 1
+
+
+def _increment(a: int) -> int:
+    return a + 1
+
+
+def chain(n: int) -> Task:
+    components = increment()
+    for _ in range(n - 1):
+        components = components | increment()
+    return components.to_task().compile()
+
+
+#########
+# Cases #
+#########
+
+
+@case("dispatch")
+def dispatch(quick: bool) -> Iterator[tuple[str, Callable[[], Any]]]:
+    """Per-stage cost of running a flat task"""
+    for n in (1, 10) if quick else (1, 10, 100):
+        task = chain(n)
+        funcs = [_increment] * n
+
+        def functions(funcs: list[Callable] = funcs) -> int:
+            a = 0
+            for func in funcs:
+                a = func(a)
+            return a
+
+        pipeline = Pipeline(
+            [(f"s{i}", FunctionTransformer(_increment)) for i in range(n)]
+        )
+
+        yield f"{n} stages/task", lambda task=task: task(0)
+        yield f"{n} stages/functions", functions
+        yield f"{n} stages/sklearn", lambda pipeline=pipeline: pipeline.transform(0)
+
+
+@case("nesting")
+def nesting(quick: bool) -> Iterator[tuple[str, Callable[[], Any]]]:
+    """Cost of subtasks nested with `as_component`"""
+    for depth in (1, 4) if quick else (1, 4, 16):
+        task = chain(2)
+        for _ in range(depth - 1):
+            task = (task.as_component() | increment()).to_task().compile()
+
+        def functions(depth: int = depth) -> int:
+            a = 0
+            for _ in range(depth + 1):
+                a = _increment(a)
+            return a
+
+        yield f"depth {depth}/task", lambda task=task: task(0)
+        yield f"depth {depth}/functions", functions
+
+
+@case("fan-out")
+def fan_out(quick: bool) -> Iterator[tuple[str, Callable[[], Any]]]:
+    """Cost of `agg`, `each` and `multi` as the number of branches grows"""
+    for width in (1, 8) if quick else (1, 8, 64):
+        args = tuple(range(width))
+        tasks = [chain(1) for _ in range(width)]
+
+        aggregate = agg(*tasks).to_task().compile()
+        repeat = each(chain(1)).to_task().compile()
+        multiple = multi(*tasks).to_task().compile()
+
+        yield f"width {width}/agg", lambda task=aggregate: task(0)
+        yield f"width {width}/each", lambda task=repeat, args=args: task(*args)
+        yield f"width {width}/multi", lambda task=multiple, args=args: task(*args)
+        yield f"width {width}/functions", lambda args=args: tuple(
+            _increment(a) for a in args
+        )
+
+
+@case("columns")
+def wide_columns(quick: bool) -> Iterator[tuple[str, Callable[[], Any]]]:
+    """Selecting and transforming a few columns of a wide DataFrame"""
+
+    @component
+    def double(df: pd.DataFrame, **extra: Any) -> pd.DataFrame:
+        return df * 2
+
+    rng = np.random.default_rng(0)
+    for width in (100, 1_000) if quick else (100, 1_000, 10_000):
+        df = pd.DataFrame(
+            rng.random((1_000, width)), columns=[f"c{i}" for i in range(width)]
+        )
+        selected = list(df.columns[:10])
+        task = columns(double(), selected).to_task().compile()
+
+        def by_hand(df: pd.DataFrame = df, selected: list[str] = selected) -> Any:
+            return df.drop(columns=selected).join(df[selected] * 2)
+
+        yield f"{width} columns/task", lambda task=task, df=df: task(df)
+        yield f"{width} columns/pandas", by_hand
+
+
+@case("sklearn")
+def sklearn(quick: bool) -> Iterator[tuple[str, Callable[[], Any]]]:
+    """Overhead of the `sklearn_component` fit/transform wrapper"""
+    scaler = sklearn_component(StandardScaler)
+    rng = np.random.default_rng(0)
+
+    for rows in (100, 10_000) if quick else (100, 10_000, 1_000_000):
+        train = rng.random((rows, 8))
+        test = rng.random((rows // 4 or 1, 8))
+        task = scaler().to_task().compile()
+
+        def by_hand(train: np.ndarray = train, test: np.ndarray = test) -> Any:
+            estimator = StandardScaler()
+            return estimator.fit_transform(train), estimator.transform(test)
+
+        def pipeline(train: np.ndarray = train, test: np.ndarray = test) -> Any:
+            estimator = Pipeline([("scale", StandardScaler())])
+            return estimator.fit_transform(train), estimator.transform(test)
+
+        yield f"{rows} rows/task", lambda task=task, train=train, test=test: task(
+            train, test
+        )
+        yield f"{rows} rows/estimator", by_hand
+        yield f"{rows} rows/sklearn", pipeline
+
+
+##########
+# Runner #
+##########
+
+
+def measure(func: Callable[[], Any], repeat: int) -> float:
+    """Fastest time per call in seconds"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def run(quick: bool = False, pattern: str = "", repeat: int = 5) -> dict[str, float]:
+    results = {}
+    for name, factory in CASES.items():
+        for variant, func in factory(quick):
+            key = f"{name}/{variant}"
+            if pattern in key:
+                results[key] = measure(func, repeat)
+                print(f"{key:40} {results[key] * 1e6:12.3f} us", file=sys.stderr)
+
+    return results
+
+
+def compare(
+    results: dict[str, float], baseline: dict[str, float], threshold: float
+) -> list[str]:
+    """Keys of the results slower than the baseline by more than `threshold`"""
+    regressions = []
+    for key, seconds in results.items():
+        if key not in baseline:
+            continue
+
+        ratio = seconds / baseline[key]
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:40} {ratio:8.2f}x baseline{flag}", file=sys.stderr)
+
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="smaller sizes only")
+    parser.add_argument("--output", help="write the results to this file")
+    parser.add_argument("--compare", help="a previous output to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--filter", default="", help="only run matching cases")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = run(args.quick, args.filter, args.repeat)
+    report = {
+        "version": mymltoolkit.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "unit": "seconds per call",
+        "results": results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        return int(bool(compare(results, baseline, args.threshold)))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
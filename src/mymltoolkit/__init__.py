@@ -2,28 +2,29 @@
 
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Callable, TYPE_CHECKING
+import asyncio
+import functools
+import importlib
 import sys
+import time
 
 from mymltoolkit.component import (
     class_component,
     component,
     SupportsTask,
+    Task,
     _info,
+    _log_enabled,
+    _set_logging_level,
 )
+from mymltoolkit.parallel import imap, _check_executor
+from mymltoolkit.profiling import _record, _span
 
 from loguru import logger
-import pandas as pd
 
-# Plotting
-import seaborn.relational as _rel
-import seaborn.distributions as _dis
-import seaborn.categorical as _cat
-import seaborn.axisgrid as _grid
-import seaborn.matrix as _mat
-import seaborn.regression as _reg
-
-from sklearn.model_selection import train_test_split as _train_test_split
+if TYPE_CHECKING:
+    import pandas as pd
 
 __version__ = "0.1.0"
 __all__ = [
@@ -53,7 +54,8 @@ __all__ = [
     "train_test_split",
 ]
 
-_LOGGING_LEVEL: int = -1
+# Logging is disabled until `setup_logging` is called
+logger.disable("mymltoolkit")
 
 
 def setup_logging(
@@ -69,8 +71,6 @@ def setup_logging(
     `remove`: remove the default stderr logger
     `level`: number of logging levels (-1 for all)
     """
-    global _LOGGING_LEVEL
-
     logger.enable("mymltoolkit")
     if remove:
         logger.remove()
@@ -78,7 +78,7 @@ def setup_logging(
         sys.stderr,
         format=format,
     )
-    _LOGGING_LEVEL = level
+    _set_logging_level(level)
 
     if intercept_stdlib:
         import logging
@@ -113,28 +113,33 @@ def setup_logging(
 # Plotting (with seaborn) #
 ###########################
 
-relplot = component(_rel.relplot)
-scatterplot = component(_rel.scatterplot)
-lineplot = component(_rel.lineplot)
-displot = component(_dis.displot)
-histplot = component(_dis.histplot)
-kdeplot = component(_dis.kdeplot)
-ecdfplot = component(_dis.ecdfplot)
-rugplot = component(_dis.rugplot)
-catplot = component(_cat.catplot)
-stripplot = component(_cat.stripplot)
-swarmplot = component(_cat.swarmplot)
-boxplot = component(_cat.boxplot)
-violinplot = component(_cat.violinplot)
-pointplot = component(_cat.pointplot)
-barplot = component(_cat.barplot)
-jointplot = component(_grid.jointplot)
-pairplot = component(_grid.pairplot)
-heatmap = component(_mat.heatmap)
-clustermap = component(_mat.clustermap)
-lmplot = component(_reg.lmplot)
-regplot = component(_reg.regplot)
-residplot = component(_reg.regplot)
+# The wrappers below are created on first access (see `__getattr__`), so that importing
+# mymltoolkit does not import seaborn (and matplotlib) or scikit-learn
+
+_PLOTTING = {
+    "relplot": "seaborn.relational",
+    "scatterplot": "seaborn.relational",
+    "lineplot": "seaborn.relational",
+    "displot": "seaborn.distributions",
+    "histplot": "seaborn.distributions",
+    "kdeplot": "seaborn.distributions",
+    "ecdfplot": "seaborn.distributions",
+    "rugplot": "seaborn.distributions",
+    "catplot": "seaborn.categorical",
+    "stripplot": "seaborn.categorical",
+    "swarmplot": "seaborn.categorical",
+    "boxplot": "seaborn.categorical",
+    "violinplot": "seaborn.categorical",
+    "pointplot": "seaborn.categorical",
+    "barplot": "seaborn.categorical",
+    "jointplot": "seaborn.axisgrid",
+    "pairplot": "seaborn.axisgrid",
+    "heatmap": "seaborn.matrix",
+    "clustermap": "seaborn.matrix",
+    "lmplot": "seaborn.regression",
+    "regplot": "seaborn.regression",
+    "residplot": "seaborn.regression",
+}
 
 ################
 # Scikit-learn #
@@ -144,13 +149,43 @@ residplot = component(_reg.regplot)
 # sklearn pipelines together with the sklearn_component() function in the `component`
 # module
 
-train_test_split = component(_train_test_split)
+_SKLEARN = {
+    "train_test_split": "sklearn.model_selection",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _PLOTTING.get(name) or _SKLEARN.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = globals()[name] = component(getattr(importlib.import_module(module), name))
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_PLOTTING, *_SKLEARN])
+
 
 ########
 # Meta #
 ########
 
 
+def _call_pair(
+    tasks: list[Task], args: tuple, kwargs: dict[str, Any], inverse: bool, i: int
+) -> Any:
+    with _span("{} for argument {}", tasks[i], i):
+        if inverse:
+            return tasks[i].inverse(args[i], **kwargs)
+        return tasks[i](args[i], **kwargs)
+
+
+async def _aspan(awaitable: Any, name: str, *args: Any) -> Any:
+    with _span(name, *args):
+        return await awaitable
+
+
 @class_component
 class multi:
     """Perform a transformation for each argument"""
@@ -158,8 +193,22 @@ class multi:
     def __init__(
         self,
         *tasks: SupportsTask | None,
+        executor: str | None = None,
+        max_workers: int | None = None,
     ):
+        """`executor`: run the tasks serially (None) or concurrently ("thread" or
+            "process")
+        `max_workers`: maximum number of concurrent tasks
+
+        The wall time of each task in the last run is kept in `wall_times` (None for
+        arguments without a task).
+        """
+        _check_executor(executor)
+
         self.tasks = [task.to_task() if task else None for task in tasks]
+        self.executor = executor
+        self.max_workers = max_workers
+        self.wall_times: list[float | None] = [None] * len(self.tasks)
 
     def __call__(
         self, *args: Any, indent: int = 2, _level: int = 0
@@ -169,22 +218,33 @@ class multi:
                 "the length of args must match the length of tasks specified"
             )
 
+        if self.executor:
+            return self._run_concurrently(args, False, indent, _level)
+
+        log = _log_enabled(_level)
         outputs = []
+        wall_times: list[float | None] = []
         for i, (task, arg) in enumerate(zip(self.tasks, args)):
             if not task:
                 outputs.append(arg)  # Do nothing
+                wall_times.append(None)
                 continue
 
-            _info(
-                "Running {task} for argument {i}",
-                task=task,
-                i=i,
-                indent=indent,
-                _level=_level,
-            )
+            if log:
+                _info(
+                    "Running {task} for argument {i}",
+                    task=task,
+                    i=i,
+                    indent=indent,
+                    _level=_level,
+                )
 
-            outputs.append(task(arg, indent=indent, _level=_level + 1))
+            start = time.perf_counter()
+            with _span("{} for argument {}", task, i):
+                outputs.append(task(arg, indent=indent, _level=_level + 1))
+            wall_times.append(time.perf_counter() - start)
 
+        self.wall_times = wall_times
         return tuple(outputs)
 
     def inverse(self, *args: Any, indent: int = 2, _level: int = 0) -> Any:
@@ -193,90 +253,441 @@ class multi:
                 "the length of args must match the length of tasks specified"
             )
 
+        if self.executor:
+            return self._run_concurrently(args, True, indent, _level)
+
+        log = _log_enabled(_level)
         outputs = []
+        wall_times: list[float | None] = []
         for i, (task, arg) in enumerate(zip(self.tasks, args)):
             if not task:
                 outputs.append(arg)  # Do nothing
+                wall_times.append(None)
                 continue
 
-            _info(
-                "Inversely running {task} for argument {i}",
-                task=task,
-                i=i,
-                indent=indent,
-                _level=_level,
+            if log:
+                _info(
+                    "Inversely running {task} for argument {i}",
+                    task=task,
+                    i=i,
+                    indent=indent,
+                    _level=_level,
+                )
+
+            start = time.perf_counter()
+            with _span("{} for argument {}", task, i):
+                outputs.append(task.inverse(arg, indent=indent, _level=_level + 1))
+            wall_times.append(time.perf_counter() - start)
+
+        self.wall_times = wall_times
+        return tuple(outputs)
+
+    def _run_concurrently(
+        self, args: tuple, inverse: bool, indent: int, _level: int
+    ) -> tuple:
+        log = _log_enabled(_level)
+        message = "Inversely running" if inverse else "Running"
+
+        # Arguments without a task are passed through without being scheduled
+        scheduled = [i for i, task in enumerate(self.tasks) if task]
+        if log:
+            for i in scheduled:
+                _info(
+                    message + " {task} for argument {i} ({executor})",
+                    task=self.tasks[i],
+                    i=i,
+                    executor=self.executor,
+                    indent=indent,
+                    _level=_level,
+                )
+
+        pair = functools.partial(
+            _call_pair,
+            self.tasks,
+            args,
+            {"indent": indent, "_level": _level + 1},
+            inverse,
+        )
+
+        outputs = list(args)
+        wall_times: list[float | None] = [None] * len(self.tasks)
+        results = imap(
+            pair,
+            scheduled,
+            executor=self.executor,  # type: ignore
+            max_workers=self.max_workers,
+        )
+        for i, (output, wall_time) in zip(scheduled, results):
+            outputs[i] = output
+            wall_times[i] = wall_time
+            if self.executor == "process":  # Spans in worker processes are lost
+                _record(wall_time, "{} for argument {}", self.tasks[i], i)
+
+            if log:
+                _info(
+                    "Finished {task} for argument {i} in {wall_time:.3f}s",
+                    task=self.tasks[i],
+                    i=i,
+                    wall_time=wall_time,
+                    indent=indent,
+                    _level=_level,
+                )
+
+        self.wall_times = wall_times
+        return tuple(outputs)
+
+    async def acall(self, *args: Any, indent: int = 2, _level: int = 0) -> Any:
+        return await self._gather(args, False, indent, _level)
+
+    async def ainverse(self, *args: Any, indent: int = 2, _level: int = 0) -> Any:
+        return await self._gather(args, True, indent, _level)
+
+    async def _gather(
+        self, args: tuple, inverse: bool, indent: int, _level: int
+    ) -> tuple:
+        if len(args) != len(self.tasks):
+            raise ValueError(
+                "the length of args must match the length of tasks specified"
             )
 
-            outputs.append(task.inverse(arg, indent=indent, _level=_level + 1))
+        log = _log_enabled(_level)
+        message = "Inversely running" if inverse else "Running"
+        wall_times: list[float | None] = [None] * len(self.tasks)
+
+        async def branch(i: int, task: Task) -> Any:
+            if log:
+                _info(
+                    message + " {task} for argument {i}",
+                    task=task,
+                    i=i,
+                    indent=indent,
+                    _level=_level,
+                )
+
+            start = time.perf_counter()
+            call = task.ainverse if inverse else task.acall
+            with _span("{} for argument {}", task, i):
+                output = await call(args[i], indent=indent, _level=_level + 1)
+            wall_times[i] = time.perf_counter() - start
+            return output
 
+        # Arguments without a task are passed through
+        scheduled = [i for i, task in enumerate(self.tasks) if task]
+        results = await asyncio.gather(*(branch(i, self.tasks[i]) for i in scheduled))
+
+        outputs = list(args)
+        for i, output in zip(scheduled, results):
+            outputs[i] = output
+
+        self.wall_times = wall_times
         return tuple(outputs)
 
 
+def _indexed(func: Callable[[int], Any], i: int) -> tuple[int, Any]:
+    return i, func(i)
+
+
+def _gather(func: Callable[[int], Any], n: int, **kwargs: Any) -> list[Any]:
+    """(result, wall time) of `func(i)` for each `i` in `range(n)`, with `imap`
+
+    Results are collected as they complete and then put back in order, so a straggler
+    does not hold up the submission of later chunks.
+    """
+    results: list[Any] = [None] * n
+    for (i, output), wall_time in imap(
+        functools.partial(_indexed, func), range(n), ordered=False, **kwargs
+    ):
+        results[i] = output, wall_time
+    return results
+
+
+def _call_branch(tasks: list[Task], args: tuple, kwargs: dict[str, Any], i: int) -> Any:
+    with _span("{} {}", tasks[i], i):
+        return tasks[i](*args, **kwargs)
+
+
 @class_component
 class agg:
     """Aggregate multiple transformations over the same input"""
 
-    def __init__(self, *tasks: SupportsTask):
+    def __init__(
+        self,
+        *tasks: SupportsTask,
+        executor: str | None = None,
+        max_workers: int | None = None,
+    ):
+        """`executor`: run the tasks serially (None) or concurrently ("thread" or
+            "process")
+        `max_workers`: maximum number of concurrent tasks
+        """
+        _check_executor(executor)
+
         self.tasks = [task.to_task() for task in tasks]
+        self.executor = executor
+        self.max_workers = max_workers
 
     def __call__(
         self, *args: Any, indent: int = 2, _level: int = 0
     ) -> Any:  # _level is the indentation level
+        log = _log_enabled(_level)
+
+        if self.executor:
+            if log:
+                for i, task in enumerate(self.tasks):
+                    _info(
+                        "Running {task} {i} ({executor})",
+                        task=task,
+                        i=i,
+                        executor=self.executor,
+                        indent=indent,
+                        _level=_level,
+                    )
+
+            # `args` is shared by all the branches, and thus sent to each process worker
+            # once (see `imap`) instead of once per branch
+            branch = functools.partial(
+                _call_branch,
+                self.tasks,
+                args,
+                {"indent": indent, "_level": _level + 1},
+            )
+            results = _gather(
+                branch,
+                len(self.tasks),
+                executor=self.executor,
+                max_workers=self.max_workers,
+            )
+            if self.executor == "process":  # Spans in worker processes are lost
+                for i, (_, wall_time) in enumerate(results):
+                    _record(wall_time, "{} {}", self.tasks[i], i)
+
+            return tuple(output for output, _ in results)
+
         outputs = []
         for i, task in enumerate(self.tasks):
-            _info(
-                "Running {task} {i}",
-                task=task,
-                i=i,
-                indent=indent,
-                _level=_level,
-            )
+            if log:
+                _info(
+                    "Running {task} {i}",
+                    task=task,
+                    i=i,
+                    indent=indent,
+                    _level=_level,
+                )
 
-            outputs.append(task(*args, indent=indent, _level=_level + 1))
+            with _span("{} {}", task, i):
+                outputs.append(task(*args, indent=indent, _level=_level + 1))
 
         return tuple(outputs)
 
+    async def acall(self, *args: Any, indent: int = 2, _level: int = 0) -> Any:
+        if _log_enabled(_level):
+            for i, task in enumerate(self.tasks):
+                _info(
+                    "Running {task} {i}",
+                    task=task,
+                    i=i,
+                    indent=indent,
+                    _level=_level,
+                )
+
+        return tuple(
+            await asyncio.gather(
+                *(
+                    _aspan(
+                        task.acall(*args, indent=indent, _level=_level + 1),
+                        "{} {}",
+                        task,
+                        i,
+                    )
+                    for i, task in enumerate(self.tasks)
+                )
+            )
+        )
+
+
+def _call_each(task: Task, args: tuple, kwargs: dict[str, Any], i: int) -> Any:
+    with _span("{}", task):  # All arguments are aggregated into the same node
+        return task(args[i], **kwargs)
+
 
 @class_component
 class each:
     """Apply a transformation on each of the arguments"""
 
-    def __init__(self, task: SupportsTask):
+    def __init__(
+        self,
+        task: SupportsTask,
+        *,
+        executor: str | None = None,
+        max_workers: int | None = None,
+        chunksize: int = 1,
+    ):
+        """`executor`: process the arguments serially (None) or concurrently
+            ("thread" or "process")
+        `max_workers`: maximum number of concurrent workers
+        `chunksize`: number of arguments sent to a worker at once
+        """
+        _check_executor(executor)
+
         self.task = task.to_task()
+        self.executor = executor
+        self.max_workers = max_workers
+        self.chunksize = chunksize
 
     def __call__(
         self, *args: Any, indent: int = 2, _level: int = 0
     ) -> Any:  # _level is the indentation level
+        log = _log_enabled(_level)
+
+        if self.executor:
+            if log:
+                for i in range(len(args)):
+                    _info(
+                        "Running {task} for argument {i} ({executor})",
+                        task=self.task,
+                        i=i,
+                        executor=self.executor,
+                        indent=indent,
+                        _level=_level,
+                    )
+
+            # Workers receive the task and the arguments once and are then sent chunks
+            # of indices, which idle workers pick up as they go
+            call = functools.partial(
+                _call_each,
+                self.task,
+                args,
+                {"indent": indent, "_level": _level + 1},
+            )
+            results = _gather(
+                call,
+                len(args),
+                executor=self.executor,
+                max_workers=self.max_workers,
+                chunksize=self.chunksize,
+            )
+            if self.executor == "process":  # Spans in worker processes are lost
+                for _, wall_time in results:
+                    _record(wall_time, "{}", self.task)
+
+            return tuple(output for output, _ in results)
+
         outputs = []
         for i, arg in enumerate(args):
-            _info(
-                "Running {task} for argument {i}",
-                task=self.task,
-                i=i,
-                indent=indent,
-                _level=_level,
-            )
+            if log:
+                _info(
+                    "Running {task} for argument {i}",
+                    task=self.task,
+                    i=i,
+                    indent=indent,
+                    _level=_level,
+                )
 
-            outputs.append(self.task(arg, indent=indent, _level=_level + 1))
+            with _span("{}", self.task):
+                outputs.append(self.task(arg, indent=indent, _level=_level + 1))
 
         return tuple(outputs)
 
+    async def acall(self, *args: Any, indent: int = 2, _level: int = 0) -> Any:
+        if _log_enabled(_level):
+            for i in range(len(args)):
+                _info(
+                    "Running {task} for argument {i}",
+                    task=self.task,
+                    i=i,
+                    indent=indent,
+                    _level=_level,
+                )
+
+        return tuple(
+            await asyncio.gather(
+                *(
+                    _aspan(
+                        self.task.acall(arg, indent=indent, _level=_level + 1),
+                        "{}",
+                        self.task,
+                    )
+                    for arg in args
+                )
+            )
+        )
+
+
+# Beyond this many pieces (runs of untouched or replaced columns), `columns` copies its
+# result into a few blocks: pandas warns about frames that fragmented, which are slow to
+# assemble and to use
+_MAX_PIECES = 100
+
+
+def _concat_columns(pieces: list[pd.DataFrame]) -> pd.DataFrame:
+    import pandas as pd
+
+    if int(pd.__version__.split(".")[0]) >= 3:  # Copies are lazy (copy-on-write)
+        return pd.concat(pieces, axis=1)
+    return pd.concat(pieces, axis=1, copy=False)
+
 
 @class_component
 class columns:
+    """Apply a transformation on some columns of a DataFrame
+
+    `columns`: a column label or a list of labels (all columns by default)
+
+    The result is assembled from slices of the input and the output of `task`, so the
+    untouched columns are not copied: memory overhead is proportional to the selected
+    columns. Without copy-on-write (the default before pandas 3), the untouched columns
+    of the result are views of the input, like other pandas views. If the selected
+    columns are scattered over more than a hundred runs, the result is copied instead.
+    """
+
     def __init__(self, task: SupportsTask, columns: Any = None):
         self.task = task.to_task()
         self.columns = columns
 
     def __call__(self, df: pd.DataFrame, **kwargs: Any) -> pd.DataFrame:
+        import numpy as np
+        import pandas as pd
+
         if self.columns is None:
-            cols = df.columns
+            cols = list(df.columns)
+        elif pd.api.types.is_list_like(self.columns):
+            cols = list(self.columns)
         else:
-            cols = self.columns
+            cols = [self.columns]
 
         res = self.task(
             df[cols],
             **kwargs,
         )
-
-        return df.join(df.drop(columns=cols), res)
+        if isinstance(res, pd.Series):
+            res = res.to_frame()
+        elif not isinstance(res, pd.DataFrame):
+            res = pd.DataFrame(res, index=df.index, columns=cols)
+        if not res.index.equals(df.index):
+            res = res.reindex(df.index)
+
+        # Positions of the columns of the result among those of `df` followed by those
+        # of `res`: selected columns keep their position (new ones are appended, missing
+        # ones are dropped)
+        n = df.shape[1]
+        positions = np.unique(df.columns.get_indexer_for(cols))
+        targets = res.columns.get_indexer(df.columns[positions])
+        order = np.arange(n)
+        order[positions] = np.where(targets < 0, -1, n + targets)
+        added = np.setdiff1d(np.arange(res.shape[1]), targets)
+        order = np.concatenate([order[order >= 0], n + added])
+
+        # Runs of consecutive positions are passed on as slices
+        breaks = np.flatnonzero((np.diff(order) != 1) | (order[1:] == n)) + 1
+        runs = np.split(order, breaks)
+        if len(runs) > _MAX_PIECES or not len(order):
+            return _concat_columns([df, res]).iloc[:, order]
+
+        return _concat_columns(
+            [
+                df.iloc[:, run[0] : run[-1] + 1]
+                if run[0] < n
+                else res.iloc[:, run[0] - n : run[-1] - n + 1]
+                for run in runs
+            ]
+        )
@@ -0,0 +1,491 @@
+"""Persistent caching of component results"""
+
+from __future__ import annotations
+
+import errno
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import sys
+import threading
+import uuid
+import warnings
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from mymltoolkit.component import Component, ComponentList, Task, _as_args, _info
+
+__all__ = ("fingerprint", "DiskCache", "MemoryCache")
+
+_MISSING = object()
+
+
+################
+# Fingerprints #
+################
+
+
+@functools.lru_cache(maxsize=1024)
+def _source_hash(obj: Callable) -> str:
+    """Hash of the source code of a function or class (or of its bytecode)"""
+    try:
+        source = inspect.getsource(obj).encode()
+    except (OSError, TypeError):
+        code = getattr(obj, "__code__", None)
+        if code is None:
+            warnings.warn(
+                f"cannot find the source code of {obj!r}: cached results will not be "
+                "invalidated when it changes",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+        source = code.co_code if code is not None else b""
+
+    return hashlib.blake2b(source, digest_size=16).hexdigest()
+
+
+def _update(h: Any, obj: Any) -> None:
+    h.update(type(obj).__qualname__.encode())
+
+    if obj is None or isinstance(obj, (bool, int, float, complex, str)):
+        h.update(repr(obj).encode())
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        h.update(obj)
+    elif isinstance(obj, (tuple, list)):
+        h.update(str(len(obj)).encode())
+        for item in obj:
+            _update(h, item)
+    elif isinstance(obj, dict):
+        h.update(str(len(obj)).encode())
+        for key in sorted(obj, key=repr):
+            _update(h, key)
+            _update(h, obj[key])
+    elif isinstance(obj, (set, frozenset)):
+        # Iteration order depends on hash randomization, so items are hashed in the
+        # order of their fingerprints
+        h.update(str(len(obj)).encode())
+        for item in sorted(fingerprint(item) for item in obj):
+            h.update(item.encode())
+    elif isinstance(obj, np.ndarray) and not obj.dtype.hasobject:
+        h.update(f"{obj.dtype.str}{obj.shape}".encode())
+        h.update(np.ascontiguousarray(obj).reshape(-1).view(np.uint8))
+    elif isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        if isinstance(obj, pd.DataFrame):
+            _update(h, list(obj.columns))
+            _update(h, [str(dtype) for dtype in obj.dtypes])
+        else:
+            _update(h, [obj.name, str(obj.dtype)])
+        _update(h, pd.util.hash_pandas_object(obj).to_numpy())
+    elif isinstance(obj, Component):
+        # Prefer the constructor call (`component()`/`class_component()` arguments) over
+        # the bound `func`
+        _update(h, obj.config if obj.config is not None else obj.func)
+    elif isinstance(obj, Task):
+        _update(h, obj.components)
+    elif isinstance(obj, ComponentList):
+        _update(h, list(obj))
+    elif isinstance(obj, functools.partial):
+        _update(h, obj.func)
+        _update(h, obj.args)
+        _update(h, obj.keywords)
+    elif inspect.isfunction(obj) or inspect.isclass(obj):
+        _update(h, [obj.__module__, obj.__qualname__, _source_hash(obj)])
+    else:
+        try:
+            h.update(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception as e:
+            raise TypeError(f"cannot fingerprint {type(obj).__name__} objects") from e
+
+
+def fingerprint(obj: Any) -> str:
+    """A stable hex digest of `obj`
+
+    Arrays and pandas objects are hashed by content, components by the source code of
+    the wrapped callable and the arguments it was configured with.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    _update(h, obj)
+    return h.hexdigest()
+
+
+###########
+# Storage #
+###########
+
+
+def _dump(obj: Any, directory: Path, stem: str) -> str:
+    """Write `obj` to `directory`, returning the file name"""
+    if isinstance(obj, np.ndarray) and not obj.dtype.hasobject:
+        name = f"{stem}.npy"
+        np.save(directory / name, obj, allow_pickle=False)
+        return name
+
+    if isinstance(obj, pd.DataFrame):
+        name = f"{stem}.parquet"
+        try:
+            obj.to_parquet(directory / name)
+            return name
+        except (ImportError, ValueError, TypeError):
+            # No parquet engine installed, or columns/dtypes parquet cannot represent
+            if (directory / name).exists():
+                (directory / name).unlink()
+
+    name = f"{stem}.pkl"
+    with open(directory / name, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return name
+
+
+def _load(path: Path, mmap: bool = True) -> Any:
+    if path.suffix == ".npy":
+        # Copy-on-write, so that consumers may modify arrays in place
+        return np.load(path, mmap_mode="c" if mmap else None, allow_pickle=False)
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def _dump_all(value: Any, directory: Path) -> dict[str, Any]:
+    """Write `value` (tuples item by item) to `directory`, returning metadata"""
+    items = value if type(value) is tuple else (value,)
+    files = [_dump(item, directory, str(i)) for i, item in enumerate(items)]
+
+    return {
+        "tuple": type(value) is tuple,
+        "files": files,
+        "nbytes": sum(os.path.getsize(directory / name) for name in files),
+    }
+
+
+def _load_all(directory: Path, meta: dict[str, Any], mmap: bool = True) -> Any:
+    items = tuple(_load(directory / name, mmap) for name in meta["files"])
+    return items if meta["tuple"] else items[0]
+
+
+def _write_entry(directory: Path, value: Any, **meta: Any) -> None:
+    """Replace `directory` by an entry holding `value` (see `_dump_all`)"""
+    # Write to a temporary directory first so that readers never see partial entries
+    tmp = directory.parent / f".tmp-{uuid.uuid4().hex}"
+    tmp.mkdir()
+    try:
+        meta.update(_dump_all(value, tmp))
+        with open(tmp / "meta.json", "w") as f:
+            json.dump(meta, f)
+
+        shutil.rmtree(directory, ignore_errors=True)
+        try:
+            os.replace(tmp, directory)
+        except OSError as e:
+            # Another writer stored an entry in the meantime, which is kept
+            if (
+                e.errno not in (errno.ENOTEMPTY, errno.EEXIST)
+                and not directory.exists()
+            ):
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _read_meta(directory: Path) -> dict[str, Any] | None:
+    try:
+        with open(directory / "meta.json") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+class DiskCache:
+    """A content-addressed on-disk cache, evicting least recently used entries
+
+    `directory`: where entries are stored
+    `max_bytes`: evict entries once their total size exceeds this (None for no limit)
+    `mmap`: memory-map cached arrays (copy-on-write) when loading them
+
+    Arrays are stored as `.npy`, DataFrames as parquet (if pyarrow or fastparquet is
+    installed) and everything else is pickled.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        max_bytes: int | None = None,
+        mmap: bool = True,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.mmap = mmap
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _meta(self, key: str) -> dict[str, Any] | None:
+        return _read_meta(self.directory / key)
+
+    def __contains__(self, key: str) -> bool:
+        return self._meta(key) is not None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        meta = self._meta(key)
+        if meta is None:
+            return default
+
+        os.utime(self.directory / key)  # Mark as recently used
+        return _load_all(self.directory / key, meta, self.mmap)
+
+    def put(self, key: str, value: Any) -> None:
+        _write_entry(self.directory / key, value)
+
+        if self.max_bytes is not None:
+            self.evict(self.max_bytes)
+
+    def evict(self, max_bytes: int = 0) -> None:
+        """Remove least recently used entries until at most `max_bytes` are used"""
+        entries = []
+        for path in self.directory.iterdir():
+            meta = None if path.name.startswith(".") else self._meta(path.name)
+            if meta is not None:
+                entries.append((path.stat().st_mtime, meta["nbytes"], path))
+
+        total = sum(nbytes for _, nbytes, _ in entries)
+        for _, nbytes, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= nbytes
+
+    def clear(self) -> None:
+        self.evict(0)
+
+    def wrap(self, component: Component) -> Callable:
+        """The `func` of `component`, looking up results in this cache first"""
+        return functools.partial(self._call, component.func, fingerprint(component))
+
+    def _call(self, func: Callable, prefix: str, *args: Any, **kwargs: Any) -> Any:
+        # `indent` and `_level` are not part of the key
+        key = fingerprint((prefix, args))
+
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = func(*args, **kwargs)
+            self.put(key, value)
+
+        return value
+
+
+def _sizeof(obj: Any) -> int:
+    """Approximate memory footprint of `obj` in bytes"""
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, (tuple, list)):
+        return sys.getsizeof(obj) + sum(_sizeof(item) for item in obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            _sizeof(key) + _sizeof(value) for key, value in obj.items()
+        )
+    return sys.getsizeof(obj)
+
+
+class MemoryCache:
+    """An in-memory cache of stage outputs, evicting least recently used entries
+
+    `max_bytes`: approximate budget for the cached outputs (see `_sizeof`) and, with
+        `key="identity"`, the inputs they keep alive
+    `key`: look up inputs by "fingerprint" (content) or by "identity" (the very same
+        objects, which is cheaper but misses equal copies)
+
+    Cached outputs are returned as is, so stages must not modify their inputs in place.
+    `hits`, `misses` and `evictions` count lookups and evicted entries.
+    """
+
+    def __init__(self, max_bytes: int, key: str = "fingerprint"):
+        if key not in ("fingerprint", "identity"):
+            raise ValueError('`key` should be either "fingerprint" or "identity"')
+
+        self.max_bytes = max_bytes
+        self.key = key
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # key -> (inputs, output, size); inputs are kept alive so their ids stay unique
+        self._entries: OrderedDict[Any, tuple[tuple, Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Entries are not persisted: an unpickled cache starts out empty
+        state = {**self.__dict__, "_entries": OrderedDict(), "nbytes": 0}
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def info(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "nbytes": self.nbytes,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def wrap(self, func: Callable) -> Callable:
+        """`func`, looking up results in this cache first"""
+        return functools.partial(self._call, func)
+
+    def _call(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        if self.key == "identity":
+            key = (id(func), tuple(id(arg) for arg in args))
+        else:
+            key = (id(func), fingerprint(args))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                self.key == "fingerprint" or all(a is b for a, b in zip(entry[0], args))
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        output = func(*args, **kwargs)
+        size = _sizeof(output)
+        if self.key == "identity":  # The inputs are retained too
+            size += _sizeof(args)
+        if size > self.max_bytes:
+            return output
+
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[2]
+            self._entries[key] = (args if self.key == "identity" else (), output, size)
+            self.nbytes += size
+
+            while self.nbytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+
+        return output
+
+
+###############
+# Checkpoints #
+###############
+
+
+class _RunDirectory:
+    """Checkpoints of the stages of a run, numbered in order"""
+
+    def __init__(self, directory: str | os.PathLike, resume: bool):
+        self.directory = Path(directory)
+        self.resume = resume
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def latest(self, keys: list[str]) -> tuple[int, Any]:
+        """The number of leading stages with valid checkpoints, and the last output"""
+        done = 0
+        if self.resume:
+            while done < len(keys):
+                meta = _read_meta(self.directory / f"{done:03d}")
+                if meta is None or meta["fingerprint"] != keys[done]:
+                    break
+                done += 1
+
+        if done == 0:
+            return 0, None
+
+        directory = self.directory / f"{done - 1:03d}"
+        value = _load_all(directory, _read_meta(directory), mmap=False)  # type: ignore
+        return done, value
+
+    def put(self, i: int, key: str, value: Any, stage: str) -> None:
+        _write_entry(self.directory / f"{i:03d}", value, fingerprint=key, stage=stage)
+
+
+class _StageCache:
+    """Outputs of stages in a `DiskCache`, shared by all runs and variants of a task"""
+
+    def __init__(self, cache: DiskCache):
+        self.cache = cache
+
+    def latest(self, keys: list[str]) -> tuple[int, Any]:
+        for done in range(len(keys), 0, -1):
+            # Arrays are mapped copy-on-write, so the next stage may modify them
+            value = self.cache.get(keys[done - 1], _MISSING)
+            if value is not _MISSING:
+                return done, value
+        return 0, None
+
+    def put(self, i: int, key: str, value: Any, stage: str) -> None:
+        self.cache.put(key, value)
+
+
+def _run_stages(
+    task: Task,
+    args: tuple,
+    store: _RunDirectory | _StageCache,
+    indent: int = 2,
+    _level: int = 0,
+    spill: Callable[[Any], Any] | None = None,
+) -> Any:
+    """Run `task` on `args`, saving the output of each stage to `store`
+
+    Stages are the components of `task` (a subtask is one stage). The output of a stage
+    is keyed by a fingerprint chained from `args` and the configuration of every
+    component up to the stage, so the run starts after the last stage whose output is
+    still valid: changing a component reruns it and everything downstream only.
+    """
+    components = list(task.components)
+
+    keys = []
+    key = fingerprint(args)
+    for component in components:
+        key = fingerprint((key, component))
+        keys.append(key)
+
+    start, output = store.latest(keys)
+    if start > 0:
+        _info(
+            "Resuming {task} after stage {stage}",
+            task=task,
+            stage=start,
+            indent=indent,
+            _level=_level,
+        )
+    else:
+        output = args
+
+    for i in range(start, len(components)):
+        stage = Task(ComponentList((components[i],)), memo=task.memo)
+        output = stage(*_as_args(output), indent=indent, _level=_level)
+        store.put(i, keys[i], output, str(components[i]))
+        if spill is not None and i < len(components) - 1:
+            output = spill(output)
+
+    return output
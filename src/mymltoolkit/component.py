@@ -1,21 +1,37 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import copyreg
 import functools
-from dataclasses import dataclass
-from typing import Callable, Any
+import inspect
+import itertools
+import os
+import pickle
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Any, NamedTuple, TYPE_CHECKING
 from typing_extensions import ParamSpec, Protocol
 from collections.abc import Iterator, Iterable
 
 from loguru import logger
-from sklearn.base import BaseEstimator
 
-import mymltoolkit as mlt
+from mymltoolkit.parallel import imap, _check_executor
+from mymltoolkit.profiling import _instrumented, _span
+
+if TYPE_CHECKING:
+    from mymltoolkit.cache import DiskCache, MemoryCache
 
 __all__ = ("component", "Component", "ComponentList", "Task")
 
 P = ParamSpec("P")
 _logger = logger.opt(depth=1)
 
+# Number of logging levels (-1 for all), or None if logging is disabled. Set by
+# `mymltoolkit.setup_logging`
+_LOGGING_LEVEL: int | None = None
+
 
 class HasInit(Protocol[P]):
     def __init__(self, *args: P.args, **kwargs: P.kwargs):
@@ -31,10 +47,22 @@ def _identity(*args: Any, **kwargs: Any) -> Any:
     return args if len(args) > 1 else args[0]
 
 
+def _set_logging_level(level: int | None) -> None:
+    global _LOGGING_LEVEL
+    _LOGGING_LEVEL = level
+
+
+def _log_enabled(_level: int) -> bool:
+    """Whether messages at `_level` are logged (resolved per run, not per message)"""
+    level = _LOGGING_LEVEL
+    return level is not None and (level == -1 or _level <= level)
+
+
 def _info(message: str, *, indent: int = 2, _level: int = 0, **kwargs: Any):
-    if (mlt._LOGGING_LEVEL != -1) and (_level > mlt._LOGGING_LEVEL):
+    if not _log_enabled(_level):
         return
 
+    # Components are passed as is: loguru only formats the message if it is emitted
     _logger.info("{indent}" + message, indent=" " * indent * _level, **kwargs)
 
 
@@ -44,8 +72,11 @@ class Component:
     inverse_func: Callable = _identity
     name: str | None = None
     description: str | None = None
-    next: Component | None = None
-    prev: Component | None = None
+    # The constructor call that produced this component (used for fingerprinting)
+    config: functools.partial | None = field(default=None, repr=False)
+    # Native coroutine versions of `func` and `inverse_func` (see `Task.acall`)
+    async_func: Callable | None = field(default=None, repr=False)
+    async_inverse_func: Callable | None = field(default=None, repr=False)
 
     def __str__(self) -> str:
         if not self.name:
@@ -56,11 +87,56 @@ class Component:
 
     def __or__(self, other: Component) -> ComponentList:
         if isinstance(other, Component):
-            return ComponentList(self, self) | other
+            return ComponentList((self, other))
         return NotImplemented
 
     def to_task(self, name: str | None = None, description: str | None = None) -> Task:
-        return ComponentList(self, self).to_task(name, description)
+        return ComponentList((self,)).to_task(name, description)
+
+    def cached(self, cache: DiskCache) -> Component:
+        """Return a copy of this component whose results are cached in `cache`"""
+        return Component(
+            cache.wrap(self),
+            self.inverse_func,
+            name=self.name,
+            description=self.description,
+            config=self.config,
+        )
+
+    def save(self, path: str | os.PathLike) -> None:
+        """Save this component (e.g. a fitted `sklearn_component`) to `path`
+
+        Components are saved with joblib.
+        """
+        _save(self, path)
+
+    @staticmethod
+    def load(path: str | os.PathLike, mmap_mode: str | None = "r") -> Component:
+        """Load a component saved with `save`
+
+        With `mmap_mode="r"`, arrays (e.g. coefficients of fitted estimators) are
+        memory-mapped read-only, so processes loading the same file share one copy.
+        """
+        return _load(path, mmap_mode, Component)
+
+
+class _Partial(functools.partial):
+    """A partial of a function decorated with `component`
+
+    The decorated name refers to the generated function, so the wrapped function is
+    pickled by reference to it instead (like instances of `class_component` classes).
+    """
+
+    def __reduce__(self) -> Any:
+        func = self.func
+        factory = _resolve(func.__module__, func.__qualname__)
+        if factory is func or getattr(factory, "__wrapped__", None) is not func:
+            return super().__reduce__()
+        return _bind, (factory, self.args, self.keywords)
+
+
+def _bind(factory: Any, args: tuple, keywords: dict[str, Any]) -> _Partial:
+    return _Partial(factory.__wrapped__, *args, **keywords)
 
 
 def component(func: Callable[P, Any]) -> Callable[P, Component]:
@@ -70,9 +146,11 @@ def component(func: Callable[P, Any]) -> Callable[P, Component]:
         func, assigned=("__module__", "__name__", "__qualname__", "__doc__")
     )  # HACK: All components need to declare their positional arguments as optional
     def inner(*args: P.args, **kwargs: P.kwargs) -> Component:
-        partial = functools.partial(func, *args, **kwargs)
+        partial = _Partial(func, *args, **kwargs)
 
-        return Component(partial, name=func.__name__, description=func.__doc__)
+        return Component(
+            partial, name=func.__name__, description=func.__doc__, config=partial
+        )
 
     return inner
 
@@ -94,65 +172,280 @@ def class_component(cls: type[HasInit[P]]) -> Callable[P, Component]:
             getattr(instance, "inverse", _identity),
             name=cls.__name__,
             description=cls.__doc__,
+            config=functools.partial(_factory(cls, inner), *args, **kwargs),
+            async_func=getattr(instance, "acall", None),
+            async_inverse_func=getattr(instance, "ainverse", None),
         )
 
+    copyreg.pickle(cls, functools.partial(_reduce_instance, inner))
     return inner
 
 
-def sklearn_component(estimator: type[HasInit[P]]) -> Callable[P, Component]:
+def _resolve(module: str, qualname: str) -> Any:
+    try:
+        return functools.reduce(getattr, qualname.split("."), sys.modules[module])
+    except (KeyError, AttributeError):
+        return None
+
+
+def _factory(cls: type, inner: Callable[..., Component]) -> Callable[..., Any]:
+    """`cls`, or `inner` if it has taken the name of `cls` (both pickle by name)"""
+    return cls if _resolve(cls.__module__, cls.__qualname__) is cls else inner
+
+
+def _new_instance(factory: Any) -> Any:
+    cls = factory.__wrapped__
+    return cls.__new__(cls)
+
+
+def _reduce_instance(factory: Callable[..., Component], instance: Any) -> Any:
+    """Pickle instances of a decorated class by reference to the decorated name
+
+    When used as a decorator, `class_component` rebinds the name of the class to
+    `factory`, so the class itself cannot be found by pickle.
+    """
+    reduced = instance.__reduce_ex__(pickle.DEFAULT_PROTOCOL)
+    cls = type(instance)
+    if (
+        not isinstance(reduced, tuple)
+        or reduced[0] is not copyreg.__newobj__
+        or reduced[1] != (cls,)
+        or _factory(cls, factory) is cls
+    ):
+        return reduced
+
+    return (_new_instance, (factory,), *reduced[2:])
+
+
+def _batches(data: Any, batch_size: int) -> Iterator[Any]:
+    rows = data.iloc if hasattr(data, "iloc") else data
+    for start in range(0, len(data), batch_size):
+        yield rows[start : start + batch_size]
+
+
+def _apply_batched(
+    func: Callable[[Any], Any],
+    data: Any,
+    batch_size: int | None,
+    executor: str | None,
+    max_workers: int | None,
+) -> Any:
+    """`func(data)`, applied to batches of `batch_size` rows at a time
+
+    Results are copied into an output allocated after the first batch, so only a few
+    batches are held in memory besides `data` and the output (sparse matrices and
+    extension arrays are concatenated instead).
+    """
+    n_rows = len(data)
+    if batch_size is None or n_rows <= batch_size:
+        return func(data)
+
+    if executor is None:
+        results: Iterator[Any] = map(func, _batches(data, batch_size))
+    else:
+        results = (
+            result
+            for result, _ in imap(
+                func,
+                _batches(data, batch_size),
+                executor=executor,
+                max_workers=max_workers,
+            )
+        )
+
+    first = next(results)
+    if hasattr(first, "tocsr"):  # Sparse matrices cannot be preallocated
+        import scipy.sparse
+
+        return scipy.sparse.vstack([first, *results], format=first.format)
+
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(first, (pd.DataFrame, pd.Series)):  # E.g. `set_output="pandas"`
+        # Batches of arrays are indexed from 0 by scikit-learn
+        index = getattr(data, "index", None)
+        if index is None:
+            index = pd.RangeIndex(n_rows)
+        dtypes = (
+            list(first.dtypes) if isinstance(first, pd.DataFrame) else [first.dtype]
+        )
+
+        if not all(isinstance(dtype, np.dtype) for dtype in dtypes):
+            # Extension arrays cannot be preallocated
+            output = pd.concat([first, *results])
+            output.index = index
+            return output
+        if isinstance(first, pd.DataFrame) and len(set(dtypes)) > 1:
+            # Columns are allocated separately, so as to keep their dtypes
+            columns = [np.empty(n_rows, dtype=dtype) for dtype in dtypes]
+            start = 0
+            for result in itertools.chain([first], results):
+                for i, column in enumerate(columns):
+                    column[start : start + len(result)] = result.iloc[:, i].to_numpy()
+                start += len(result)
+
+            frame = pd.DataFrame(dict(enumerate(columns)), index=index, copy=False)
+            frame.columns = first.columns
+            return frame
+
+    values = np.asarray(first)
+    output = np.empty((n_rows, *values.shape[1:]), dtype=values.dtype)
+    output[: len(values)] = values
+    start = len(values)
+    for result in results:
+        output[start : start + len(result)] = np.asarray(result)
+        start += len(result)
+
+    if isinstance(first, pd.DataFrame):
+        return pd.DataFrame(output, index=index, columns=first.columns, copy=False)
+    if isinstance(first, pd.Series):
+        return pd.Series(output, index=index, name=first.name, copy=False)
+    return output
+
+
+class _Estimator:
+    """A scikit-learn estimator fitted on `train` and applied to `test`"""
+
+    def __init__(
+        self,
+        estimator: Any,
+        batch_size: int | None = None,
+        executor: str | None = None,
+        max_workers: int | None = None,
+    ):
+        self.estimator = estimator
+        self.is_transformer = hasattr(estimator, "transform")
+        self.batch_size = batch_size
+        self.executor = executor
+        self.max_workers = max_workers
+
+    def _apply(self, func: Callable[[Any], Any], test: Any) -> Any:
+        return _apply_batched(
+            func, test, self.batch_size, self.executor, self.max_workers
+        )
+
+    def __call__(
+        self, train: Any = None, test: Any = None, **extra: Any
+    ) -> tuple[Any, Any]:
+        if self.is_transformer:
+            return (
+                self.estimator.fit_transform(train) if train is not None else None,
+                self._apply(self.estimator.transform, test)
+                if test is not None
+                else None,
+            )
+        else:
+            return (
+                self.estimator.fit(train) if train is not None else None,
+                self._apply(self.estimator.predict, test) if test is not None else None,
+            )
+
+    def inverse(
+        self, train: Any = None, test: Any = None, **extra: Any
+    ) -> tuple[Any, Any]:
+        if self.is_transformer:
+            return (
+                self.estimator.inverse_transform(train) if train is not None else None,
+                self._apply(self.estimator.inverse_transform, test)
+                if test is not None
+                else None,
+            )
+
+        return train, test
+
+
+def sklearn_component(
+    estimator: type[HasInit[P]],
+    *,
+    batch_size: int | None = None,
+    executor: str | None = None,
+    max_workers: int | None = None,
+) -> Callable[P, Component]:
+    """Generate a component from a scikit-learn estimator class
+
+    `batch_size`: transform (or predict on) `test` this many rows at a time, so that
+        peak memory stays near one batch (None for all rows at once)
+    `executor`: process batches serially (None) or on a pool ("thread" or "process")
+    `max_workers`: maximum number of workers
+
+    The component is called with `train` and `test`: the estimator is fitted on `train`
+    and then transforms `test` (or predicts on it). Fitted components can be persisted
+    with `Component.save` or `Task.save`.
+    """
+    from sklearn.base import BaseEstimator
+
     if not issubclass(estimator, BaseEstimator):
         raise TypeError("`estimator` should be a subclass of `BaseEstimator`")
+    _check_executor(executor)
+    if batch_size is not None and batch_size < 1:
+        raise ValueError("`batch_size` should be at least 1")
 
-    @class_component  # type: ignore
-    @functools.wraps(estimator)
-    class Inner:
-        def __init__(self, *args: P.args, **kwargs: P.kwargs):
-            self.estimator: Any = estimator(*args, **kwargs)
-            self.is_transformer = hasattr(estimator, "transform")
-
-        def __call__(self, train: Any, test: Any) -> tuple[Any, Any]:
-            if self.is_transformer:
-                return (
-                    self.estimator.fit_transform(train) if train else None,
-                    self.estimator.transform(test) if test else None,
-                )
-            else:
-                return (
-                    self.estimator.fit(train) if train else None,
-                    self.estimator.predict(test) if test else None,
-                )
+    @functools.wraps(
+        estimator, assigned=("__module__", "__name__", "__qualname__", "__doc__")
+    )
+    def inner(*args: P.args, **kwargs: P.kwargs) -> Component:
+        config = functools.partial(estimator, *args, **kwargs)
+        instance = _Estimator(config(), batch_size, executor, max_workers)
 
-        def inverse(self, train: Any, test: Any) -> tuple[Any, Any]:
-            if self.is_transformer:
-                return (
-                    self.estimator.inverse_transform(train) if train else None,
-                    self.estimator.inverse_transform(test) if test else None,
-                )
+        return Component(
+            instance,
+            instance.inverse,
+            name=estimator.__name__,
+            description=(estimator.__doc__ or "").strip().split("\n")[0] or None,
+            config=config,
+        )
+
+    return inner
 
-            return train, test
 
-    return Inner  # type: ignore
+def _save(obj: Any, path: str | os.PathLike) -> None:
+    import joblib
 
+    # Uncompressed, so that arrays can be memory-mapped by `_load`
+    joblib.dump(obj, path)
 
-@dataclass
+
+def _load(path: str | os.PathLike, mmap_mode: str | None, cls: type) -> Any:
+    import joblib
+
+    obj = joblib.load(path, mmap_mode=mmap_mode)
+    if not isinstance(obj, cls):
+        raise TypeError(f"{path} does not contain a {cls.__name__}")
+    return obj
+
+
+@dataclass(frozen=True)
 class ComponentList:
-    first: Component
-    last: Component
+    """An immutable sequence of components
+
+    Joining lists builds a new tuple of references to the same components, so a
+    component (and whatever it loaded on construction) can be shared by many lists and
+    tasks.
+    """
+
+    components: tuple[Component, ...]
+
+    def __post_init__(self) -> None:
+        if not self.components:
+            raise ValueError("a `ComponentList` should contain at least one component")
+
+    @property
+    def first(self) -> Component:
+        return self.components[0]
+
+    @property
+    def last(self) -> Component:
+        return self.components[-1]
 
     def add_after(self, other: Component) -> ComponentList:
-        self.last.next = other
-        other.prev = self.last
-        return ComponentList(self.first, other)
+        return ComponentList((*self.components, other))
 
     def add_before(self, other: Component) -> ComponentList:
-        self.first.prev = other
-        other.next = self.first
-        return ComponentList(other, self.last)
+        return ComponentList((other, *self.components))
 
     def concat(self, other: ComponentList) -> ComponentList:
-        self.last.next = other.first
-        other.first.prev = self.last
-        return ComponentList(self.first, other.last)
+        return ComponentList(self.components + other.components)
 
     def __or__(self, other: Component | ComponentList) -> ComponentList:
         if isinstance(other, Component):
@@ -167,21 +460,16 @@ class ComponentList:
         return NotImplemented
 
     def __iter__(self) -> Iterator[Component]:
-        yield self.first
-        current = self.first
-        while current.next:
-            yield current.next
-            current = current.next
+        return iter(self.components)
 
     def reverse_iter(self) -> Iterator[Component]:
-        yield self.last
-        current = self.last
-        while current.prev:
-            yield current.prev
-            current = current.prev
+        return reversed(self.components)
 
     def __len__(self) -> int:
-        return len(list(iter(self)))
+        return len(self.components)
+
+    def __getitem__(self, index: int) -> Component:
+        return self.components[index]
 
     def __str__(self) -> str:
         return " -> ".join([component.name or "(unnamed)" for component in self])
@@ -190,55 +478,483 @@ class ComponentList:
         return Task(self, name, description)
 
 
+class _Step(NamedTuple):
+    func: Callable
+    label: str
+    depth: int  # Nesting level of the inlined subtask the step belongs to
+    opened: tuple[str, ...]  # Labels of the subtasks entered at this step
+
+
+class _Plan(NamedTuple):
+    """A compiled `Task`: steps in execution order, with subtasks inlined"""
+
+    forward: tuple[_Step, ...]
+    inverse: tuple[_Step, ...]
+    # Coroutine functions for `Task.acall` and `Task.ainverse`
+    async_forward: tuple[_Step, ...]
+    async_inverse: tuple[_Step, ...]
+
+
+def _subtask(component: Component) -> Task | None:
+    """The subtask wrapped by `component` (see `Task.as_component`), if inlinable"""
+    task = component.func
+    if (
+        isinstance(task, Task)
+        and task.memo is None  # Its own memo must see the subtask as a whole
+        and component.inverse_func == task.inverse
+        and component.async_func == task.acall
+        and component.async_inverse_func == task.ainverse
+    ):
+        return task
+    return None
+
+
+def _inline(label: str, steps: tuple[_Step, ...], wrap: Callable) -> list[_Step]:
+    """The steps of a subtask labelled `label`, one level deeper"""
+    inlined = [
+        _Step(wrap(func), step_label, depth + 1, opened)
+        for func, step_label, depth, opened in steps
+    ]
+    inlined[0] = inlined[0]._replace(opened=(label, *inlined[0].opened))
+    return inlined
+
+
+def _enter(
+    step: _Step,
+    spans: list[Any],
+    log: bool,
+    message: str,
+    args: Any,
+    indent: int,
+    _level: int,
+) -> None:
+    """Leave the subtasks finished before `step` and enter those starting at it"""
+    _, _, depth, opened = step
+    while len(spans) > depth - len(opened):
+        spans.pop().__exit__(None, None, None)
+
+    for level, label in enumerate(opened, _level + depth - len(opened)):
+        if log:
+            _info(message, component=label, indent=indent, _level=level)
+        span = _span(label, inputs=args)
+        span.__enter__()
+        spans.append(span)
+
+
+def _leave(spans: list[Any]) -> None:
+    while spans:
+        spans.pop().__exit__(None, None, None)
+
+
+def _run_sync(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(func(*args, **kwargs))
+
+    # Called from a running loop (e.g. in Jupyter), which cannot run another one until
+    # this returns: run the coroutine in a loop of its own on a helper thread
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(1) as pool:
+        return pool.submit(
+            context.run, lambda: asyncio.run(func(*args, **kwargs))
+        ).result()
+
+
+async def _run_in_thread(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()  # E.g. for profiling
+    return await loop.run_in_executor(
+        None, functools.partial(context.run, func, *args, **kwargs)
+    )
+
+
+def _as_sync(func: Callable) -> Callable:
+    # Coroutine functions are run to completion when called from synchronous code
+    if inspect.iscoroutinefunction(func):
+        return functools.partial(_run_sync, func)
+    return func
+
+
+def _as_async(func: Callable, async_func: Callable | None) -> Callable:
+    if async_func is not None:
+        return async_func
+    if inspect.iscoroutinefunction(func):
+        return func
+    # Synchronous components run in the default executor so as not to block the loop
+    return functools.partial(_run_in_thread, func)
+
+
+# Whether instances of a type are iterable, cached since `isinstance` checks against
+# ABCs are comparatively slow
+_ITERABLE_TYPES: dict[type, bool] = {tuple: True}
+
+
+def _as_args(args: Any) -> Any:
+    # Ensure args is an iterable suitable for unpacking
+    try:
+        iterable = _ITERABLE_TYPES[type(args)]
+    except KeyError:
+        iterable = _ITERABLE_TYPES[type(args)] = isinstance(args, Iterable)
+
+    return args if iterable else (args,)
+
+
+def _call_task(task: Task, kwargs: dict[str, Any], input: Any) -> Any:
+    return task(*(input if type(input) is tuple else (input,)), **kwargs)
+
+
 @dataclass
 class Task:
     components: ComponentList
     name: str | None = None
     description: str | None = None
+    # Memoizes the output of each stage (see `memoize`)
+    memo: MemoryCache | None = field(default=None, repr=False, compare=False)
+    _plan: _Plan | None = field(default=None, init=False, repr=False, compare=False)
+
+    def compile(self) -> Task:
+        """Flatten `components` into an immutable execution plan
+
+        Nested subtasks are compiled as well and their steps are inlined into this plan
+        (unless they have a memo of their own), so that running the task does not
+        recurse. Called automatically on first use; call it again if `components` (of
+        this task or a subtask) was replaced afterwards.
+        """
+        wrap = self.memo.wrap if self.memo is not None else lambda func: func
+
+        forward: list[_Step] = []
+        async_forward: list[_Step] = []
+        for component in self.components:
+            label = str(component)
+            if isinstance(component.func, Task):
+                component.func.compile()
+
+            subtask = _subtask(component)
+            if subtask is not None:
+                plan: _Plan = subtask._plan  # type: ignore
+                forward += _inline(label, plan.forward, wrap)
+                async_forward += _inline(label, plan.async_forward, lambda func: func)
+                continue
+
+            forward.append(_Step(wrap(_as_sync(component.func)), label, 0, ()))
+            async_forward.append(
+                _Step(_as_async(component.func, component.async_func), label, 0, ())
+            )
+
+        inverse: list[_Step] = []
+        async_inverse: list[_Step] = []
+        for component in self.components.reverse_iter():
+            label = str(component)
+            subtask = _subtask(component)
+            if subtask is not None:
+                plan = subtask._plan  # type: ignore
+                inverse += _inline(label, plan.inverse, wrap)
+                async_inverse += _inline(label, plan.async_inverse, lambda func: func)
+                continue
+
+            inverse.append(_Step(wrap(_as_sync(component.inverse_func)), label, 0, ()))
+            async_inverse.append(
+                _Step(
+                    _as_async(component.inverse_func, component.async_inverse_func),
+                    label,
+                    0,
+                    (),
+                )
+            )
+
+        self._plan = _Plan(
+            tuple(forward), tuple(inverse), tuple(async_forward), tuple(async_inverse)
+        )
+        return self
 
     def __call__(
         self, *args: Any, indent: int = 2, _level: int = 0
     ) -> Any:  # _level is the indentation level
-        for component in self.components:
-            _info(
-                "Running {component}", component=component, indent=indent, _level=_level
-            )
+        plan = self._plan if self._plan is not None else self.compile()._plan
+        return self._run(
+            plan.forward, "Running {component}", args, indent, _level  # type: ignore
+        )
 
-            # Ensure args is an iterable suitable for unpacking
-            if not isinstance(args, Iterable):
-                args = (args,)
+    def inverse(self, *args: Any, indent: int = 2, _level: int = 0) -> Any:
+        plan = self._plan if self._plan is not None else self.compile()._plan
+        return self._run(
+            plan.inverse,  # type: ignore
+            "Inversely running {component}",
+            args,
+            indent,
+            _level,
+        )
 
-            args = component.func(*args, indent=indent, _level=_level + 1)
+    async def acall(self, *args: Any, indent: int = 2, _level: int = 0) -> Any:
+        """Run this task, awaiting coroutine components
+
+        Synchronous components run in the event loop's default executor. Memoization
+        (see `memoize`) only applies to synchronous calls.
+        """
+        plan = self._plan if self._plan is not None else self.compile()._plan
+        return await self._arun(
+            plan.async_forward,  # type: ignore
+            "Running {component}",
+            args,
+            indent,
+            _level,
+        )
 
-        return args
+    async def ainverse(self, *args: Any, indent: int = 2, _level: int = 0) -> Any:
+        plan = self._plan if self._plan is not None else self.compile()._plan
+        return await self._arun(
+            plan.async_inverse,  # type: ignore
+            "Inversely running {component}",
+            args,
+            indent,
+            _level,
+        )
 
-    def inverse(self, *args: Any, indent: int = 2, _level: int = 0) -> Any:
-        for component in self.components.reverse_iter():
-            _info(
-                "Inversely running {component}",
-                component=component,
-                indent=indent,
-                _level=_level,
-            )
+    def run(
+        self,
+        *args: Any,
+        checkpoint: str | os.PathLike | None = None,
+        resume: bool = False,
+        store: DiskCache | None = None,
+        max_memory: int | None = None,
+        spill_dir: str | os.PathLike | None = None,
+        indent: int = 2,
+        _level: int = 0,
+    ) -> Any:
+        """Run this task, optionally saving the output of each stage
+
+        `checkpoint`: a run directory to write the output of each component to
+        `resume`: skip the stages whose outputs in `checkpoint` are still valid, i.e.
+            were computed from the same `args` by the same components
+        `store`: a `DiskCache` of stage outputs shared across runs, so that only the
+            components whose configuration changed (and those downstream) are rerun
+        `max_memory`: resident set size (in bytes) above which large intermediate arrays
+            and DataFrames are spilled to memory-mapped files (see `memory.Spiller`)
+        `spill_dir`: where spill files are created (under the user cache directory by
+            default; avoid in-memory file systems such as tmpfs)
+
+        Outputs are stored like in `DiskCache` (`.npy`, parquet or pickle).
+        """
+        if checkpoint is not None and store is not None:
+            raise ValueError("specify either `checkpoint` or `store`, not both")
+
+        spill = None
+        if max_memory is not None:
+            from mymltoolkit.memory import Spiller
+
+            spill = Spiller(max_memory, spill_dir)
+
+        try:
+            if checkpoint is None and store is None:
+                plan = self._plan if self._plan is not None else self.compile()._plan
+                return self._run(
+                    plan.forward,  # type: ignore
+                    "Running {component}",
+                    args,
+                    indent,
+                    _level,
+                    spill,
+                )
 
-            # Ensure args is an iterable suitable for unpacking
-            if not isinstance(args, Iterable):
-                args = (args,)
+            from mymltoolkit.cache import _RunDirectory, _StageCache, _run_stages
 
-            args = component.inverse_func(*args, indent=indent, _level=_level + 1)
+            if checkpoint is not None:
+                stages: _RunDirectory | _StageCache = _RunDirectory(checkpoint, resume)
+            else:
+                stages = _StageCache(store)  # type: ignore
+            return _run_stages(self, args, stages, indent, _level, spill)
+        finally:
+            if spill is not None:
+                spill.close()
+
+    def stream(
+        self,
+        chunks: Iterable[Any],
+        *,
+        inverse: bool = False,
+        indent: int = 2,
+        _level: int = 0,
+    ) -> Iterator[Any]:
+        """Lazily run this task (or its inverse) on each of `chunks`
+
+        `chunks` can be any iterable, such as `pd.read_csv(..., chunksize=...)`; a tuple
+        chunk is unpacked into arguments. Only one chunk is processed at a time, so
+        memory use is bounded by the chunk size. Stages should be stateless, as each
+        chunk runs through the whole chain independently.
+        """
+        plan = self._plan if self._plan is not None else self.compile()._plan
+        if inverse:
+            steps = plan.inverse  # type: ignore
+            message = "Inversely running {component}"
+        else:
+            steps = plan.forward  # type: ignore
+            message = "Running {component}"
+
+        for chunk in chunks:
+            yield self._run(
+                steps,
+                message,
+                chunk if type(chunk) is tuple else (chunk,),
+                indent,
+                _level,
+            )
 
+    def map(
+        self,
+        inputs: Iterable[Any],
+        *,
+        executor: str | None = None,
+        max_workers: int | None = None,
+        chunksize: int = 1,
+        ordered: bool = True,
+        indent: int = 2,
+        _level: int = 0,
+    ) -> Iterator[Any]:
+        """Lazily run this task on each of `inputs`, possibly concurrently
+
+        `inputs`: an iterable of inputs; a tuple input is unpacked into arguments
+        `executor`: run serially (None) or on a pool ("thread" or "process")
+        `max_workers`: maximum number of workers
+        `chunksize`: number of inputs sent to a worker at once
+        `ordered`: yield results in the order of `inputs` instead of as they complete
+
+        The task is compiled once and sent to each process worker once. Results can be
+        consumed while later inputs are still being processed.
+        """
+        if executor is None:
+            return self.stream(inputs, indent=indent, _level=_level)
+
+        self.compile()
+        call = functools.partial(_call_task, self, {"indent": indent, "_level": _level})
+        return (
+            output
+            for output, _ in imap(
+                call,
+                inputs,
+                executor=executor,
+                max_workers=max_workers,
+                chunksize=chunksize,
+                ordered=ordered,
+            )
+        )
+
+    @staticmethod
+    def _run(
+        steps: tuple[_Step, ...],
+        message: str,
+        args: Any,
+        indent: int,
+        _level: int,
+        spill: Callable[[Any], Any] | None = None,
+    ) -> Any:
+        log = _log_enabled(_level)
+        if log or spill is not None or _instrumented():
+            spans: list[Any] = []  # Of the inlined subtasks currently running
+            last = len(steps) - 1
+            try:
+                for i, step in enumerate(steps):
+                    func, label, depth, opened = step
+                    if opened or spans:
+                        _enter(step, spans, log, message, args, indent, _level)
+                    if log:
+                        _info(
+                            message,
+                            component=label,
+                            indent=indent,
+                            _level=_level + depth,
+                        )
+                    with _span(label, inputs=args):
+                        args = func(
+                            *_as_args(args), indent=indent, _level=_level + depth + 1
+                        )
+                    if spill is not None and i < last:
+                        args = spill(args)
+                return args
+            finally:
+                _leave(spans)
+
+        for func, _, depth, _ in steps:
+            args = func(*_as_args(args), indent=indent, _level=_level + depth + 1)
         return args
 
+    @staticmethod
+    async def _arun(
+        steps: tuple[_Step, ...],
+        message: str,
+        args: Any,
+        indent: int,
+        _level: int,
+    ) -> Any:
+        log = _log_enabled(_level)
+        spans: list[Any] = []
+        try:
+            for step in steps:
+                func, label, depth, opened = step
+                if opened or spans:
+                    _enter(step, spans, log, message, args, indent, _level)
+                if log:
+                    _info(
+                        message, component=label, indent=indent, _level=_level + depth
+                    )
+                with _span(label, inputs=args):
+                    args = await func(
+                        *_as_args(args), indent=indent, _level=_level + depth + 1
+                    )
+            return args
+        finally:
+            _leave(spans)
+
     def as_component(self) -> Component:
         return Component(
             self,
             self.inverse,
             name=f"subtask {self.name}" if self.name else "subtask",
             description=self.description,
+            async_func=self.acall,
+            async_inverse_func=self.ainverse,
         )
 
     def to_task(self, name: str | None = None, description: str | None = None) -> Task:
-        return Task(self.components, name or self.name, description or self.description)
+        return Task(
+            self.components,
+            name or self.name,
+            description or self.description,
+            memo=self.memo,
+        )
+
+    def memoize(self, max_bytes: int, key: str = "fingerprint") -> Task:
+        """Return a copy of this task which memoizes the output of each stage in memory
+
+        `max_bytes`: approximate memory budget of the memoized outputs
+        `key`: look up inputs by "fingerprint" (content) or "identity"
+
+        Hits, misses and evictions are counted by `memo` (see `MemoryCache`).
+        """
+        from mymltoolkit.cache import MemoryCache
+
+        return Task(
+            self.components,
+            self.name,
+            self.description,
+            memo=MemoryCache(max_bytes, key),
+        )
+
+    def save(self, path: str | os.PathLike) -> None:
+        """Save this task (e.g. with fitted `sklearn_component`s) to `path`
+
+        Tasks are saved with joblib.
+        """
+        _save(self, path)
+
+    @staticmethod
+    def load(path: str | os.PathLike, mmap_mode: str | None = "r") -> Task:
+        """Load a task saved with `save` (see `Component.load` for `mmap_mode`)"""
+        return _load(path, mmap_mode, Task)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # The plan is rebuilt on first use after unpickling
+        return {**self.__dict__, "_plan": None}
 
     def __or__(self, other: Component | ComponentList | Task) -> ComponentList:
         return self.as_component() | other
@@ -0,0 +1,238 @@
+"""Pipelines as directed acyclic graphs of tasks"""
+
+from __future__ import annotations
+
+import contextvars
+from collections.abc import Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any
+
+from mymltoolkit.component import (
+    Component,
+    ComponentList,
+    SupportsTask,
+    Task,
+    _info,
+    _log_enabled,
+)
+from mymltoolkit.profiling import _span
+
+__all__ = ("DAG",)
+
+
+@dataclass(frozen=True)
+class _Node:
+    name: str
+    task: Task
+    inputs: tuple[str, ...]
+    outputs: tuple[str, ...] | None  # Names of the items of a tuple output
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.task})"
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        with _span("{}", self):
+            return self.task(*args, **kwargs)
+
+
+class DAG:
+    """A pipeline whose nodes consume named outputs of earlier nodes
+
+    `inputs`: names of the positional arguments of the DAG
+    `outputs`: names of the values returned by the DAG
+    `max_workers`: maximum number of nodes running concurrently (1 runs them serially)
+
+    Nodes whose inputs are available run concurrently on a thread pool, and every value
+    is released as soon as its last consumer has finished.
+
+    ```python
+    dag = DAG(inputs=["data"], outputs=["score"])
+    dag.add("split", train_test_split(), inputs="data", outputs=["train", "test"])
+    dag.add("model", fit() | predict(), inputs=["train", "test"])
+    dag.add("score", score(), inputs=["model", "test"])
+    ```
+    """
+
+    def __init__(
+        self,
+        inputs: Sequence[str] = (),
+        outputs: Sequence[str] = (),
+        *,
+        max_workers: int | None = None,
+        name: str | None = None,
+        description: str | None = None,
+    ):
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.max_workers = max_workers
+        self.name = name
+        self.description = description
+        self.nodes: list[_Node] = []
+
+        if len(set(self.inputs)) != len(self.inputs):
+            raise ValueError("the names of inputs must be unique")
+
+    def _names(self) -> set[str]:
+        names = set(self.inputs)
+        for node in self.nodes:
+            names.add(node.name)
+            names.update(node.outputs or ())
+        return names
+
+    def add(
+        self,
+        name: str,
+        task: SupportsTask,
+        inputs: str | Sequence[str] = (),
+        outputs: Sequence[str] | None = None,
+    ) -> DAG:
+        """Add a node running `task` on the values named `inputs`
+
+        The output of the node is named `name`. If `outputs` is specified, the output
+        must be a tuple, whose items are named `outputs` as well.
+        """
+        if isinstance(inputs, str):
+            inputs = (inputs,)
+
+        names = self._names()
+        for new in (name, *(outputs or ())):
+            if new in names:
+                raise ValueError(f"{new!r} is already defined")
+        for input in inputs:
+            if input not in names:
+                # Inputs must be defined before use, so the graph is always acyclic
+                raise ValueError(f"{input!r} is not defined")
+
+        self.nodes.append(
+            _Node(
+                name,
+                task.to_task(),
+                tuple(inputs),
+                tuple(outputs) if outputs is not None else None,
+            )
+        )
+        return self
+
+    def __call__(
+        self, *args: Any, indent: int = 2, _level: int = 0
+    ) -> Any:  # _level is the indentation level
+        if len(args) != len(self.inputs):
+            raise ValueError(
+                "the length of args must match the length of inputs specified"
+            )
+
+        names = self._names()
+        for output in self.outputs:
+            if output not in names:
+                raise ValueError(f"{output!r} is not defined")
+
+        # Number of pending consumers of each value (the outputs of the DAG are
+        # consumed last)
+        consumers: dict[str, int] = {output: 1 for output in self.outputs}
+        for node in self.nodes:
+            for input in node.inputs:
+                consumers[input] = consumers.get(input, 0) + 1
+
+        values: dict[str, Any] = {}
+        log = _log_enabled(_level)
+        kwargs = {"indent": indent, "_level": _level + 1}
+
+        def store(name: str, value: Any) -> None:
+            if consumers.get(name, 0) > 0:
+                values[name] = value
+
+        def finish(node: _Node, output: Any) -> None:
+            for input in node.inputs:
+                consumers[input] -= 1
+                if consumers[input] == 0:
+                    del values[input]
+
+            store(node.name, output)
+            if node.outputs is not None:
+                if not isinstance(output, tuple) or len(output) != len(node.outputs):
+                    raise ValueError(
+                        f"{node.name} should return a tuple of "
+                        f"{len(node.outputs)} items"
+                    )
+                for name, value in zip(node.outputs, output):
+                    store(name, value)
+
+        for name, value in zip(self.inputs, args):
+            store(name, value)
+        del args
+
+        waiting = list(self.nodes)
+        ready: list[_Node] = []
+
+        def schedule() -> None:
+            available = values.keys()
+            for node in list(waiting):
+                if all(input in available for input in node.inputs):
+                    waiting.remove(node)
+                    ready.append(node)
+
+        schedule()
+
+        if self.max_workers == 1:
+            while ready:
+                node = ready.pop(0)
+                if log:
+                    _info("Running {node}", node=node, indent=indent, _level=_level)
+                finish(node, node(*(values[i] for i in node.inputs), **kwargs))
+                schedule()
+        else:
+            with ThreadPoolExecutor(self.max_workers) as pool:
+                running: dict[Future, _Node] = {}
+                try:
+                    while ready or running:
+                        while ready:
+                            node = ready.pop(0)
+                            if log:
+                                _info(
+                                    "Running {node}",
+                                    node=node,
+                                    indent=indent,
+                                    _level=_level,
+                                )
+                            future = pool.submit(
+                                contextvars.copy_context().run,  # E.g. for profiling
+                                node,
+                                *(values[i] for i in node.inputs),
+                                **kwargs,
+                            )
+                            running[future] = node
+
+                        done, _ = wait(running, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            finish(running.pop(future), future.result())
+                        schedule()
+                finally:
+                    for future in running:
+                        future.cancel()
+
+        outputs = tuple(values[output] for output in self.outputs)
+        return outputs[0] if len(outputs) == 1 else outputs
+
+    def __str__(self) -> str:
+        if not self.name:
+            return "dag"
+        if not self.description:
+            return f"dag {self.name}"
+        return f"dag {self.name}: {self.description}"
+
+    def as_component(self) -> Component:
+        return Component(
+            self,
+            name=f"dag {self.name}" if self.name else "dag",
+            description=self.description,
+        )
+
+    def to_task(self, name: str | None = None, description: str | None = None) -> Task:
+        return self.as_component().to_task(name, description)
+
+    def __or__(self, other: Component | ComponentList | Task) -> ComponentList:
+        return self.as_component() | other
+
+    def __ror__(self, other: Component | ComponentList | Task) -> ComponentList:
+        return other | self.as_component()
@@ -0,0 +1,130 @@
+"""Memory-governed execution: spilling large intermediates to memory-mapped files"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+from typing import Any
+
+__all__ = ("rss", "Spiller")
+
+
+def rss() -> int | None:
+    """Resident set size of this process in bytes (None if unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _cache_directory() -> str:
+    """The user cache directory of mymltoolkit (usually on disk, unlike /tmp)"""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or tempfile.gettempdir()
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "mymltoolkit")
+
+
+class Spiller:
+    """Moves large arrays and DataFrames to memory-mapped files while over a budget
+
+    `max_rss`: resident set size (in bytes) above which intermediates are spilled
+    `directory`: where spill files are created, in a new temporary directory (by default
+        under the user cache directory, as the system one is often in memory)
+    `min_bytes`: arrays (or DataFrame columns) smaller than this are kept in memory
+
+    Spilled data is paged back in lazily when read, and its pages are backed by the
+    files, so the OS can drop them under memory pressure instead of swapping. Spilled
+    arrays are mapped copy-on-write: modifying them allocates memory for the pages
+    written, but leaves the files untouched. Files are removed by `close`; on POSIX
+    systems, objects still referring to them remain valid.
+    """
+
+    def __init__(
+        self,
+        max_rss: int,
+        directory: str | os.PathLike | None = None,
+        min_bytes: int = 1 << 20,
+    ):
+        self.max_rss = max_rss
+        self.min_bytes = min_bytes
+        if directory is None:
+            directory = _cache_directory()
+            os.makedirs(directory, exist_ok=True)
+        self.directory = tempfile.mkdtemp(prefix="mymltoolkit-spill-", dir=directory)
+        self.spilled = 0  # Number of arrays spilled
+        self.nbytes = 0  # Bytes spilled
+
+    def __enter__(self) -> Spiller:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def over_budget(self) -> bool:
+        current = rss()
+        return current is not None and current > self.max_rss
+
+    def __call__(self, value: Any) -> Any:
+        """`value`, with its large arrays spilled if over budget"""
+        if not self.over_budget():
+            return value
+        if type(value) is tuple:
+            return tuple(self._spill(item) for item in value)
+        return self._spill(value)
+
+    def _spill(self, value: Any) -> Any:
+        import numpy as np
+        import pandas as pd
+
+        if isinstance(value, np.ndarray):
+            return self._spill_array(value)
+        if isinstance(value, pd.Series):
+            values = value.to_numpy()
+            spilled = self._spill_array(values)
+            if spilled is values:
+                return value
+            return pd.Series(spilled, index=value.index, name=value.name, copy=False)
+        if isinstance(value, pd.DataFrame):
+            columns = {}
+            changed = False
+            for i in range(value.shape[1]):
+                column = value.iloc[:, i]
+                if isinstance(column.dtype, np.dtype):  # Not extension dtypes
+                    spilled = self._spill(column)
+                    changed = changed or spilled is not column
+                    column = spilled
+                columns[i] = column
+            if not changed:
+                return value
+
+            frame = pd.DataFrame(columns, copy=False)
+            frame.columns = value.columns
+            return frame
+        return value
+
+    def _spill_array(self, array: Any) -> Any:
+        import numpy as np
+
+        if (
+            isinstance(array, np.memmap)
+            or array.dtype.hasobject
+            or array.nbytes < self.min_bytes
+        ):
+            return array
+
+        path = os.path.join(self.directory, f"{uuid.uuid4().hex}.npy")
+        np.save(path, array, allow_pickle=False)
+        self.spilled += 1
+        self.nbytes += array.nbytes
+        return np.load(path, mmap_mode="c", allow_pickle=False)
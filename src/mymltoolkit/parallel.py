@@ -0,0 +1,346 @@
+"""Thread and process pool backends for meta components"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from itertools import islice
+from typing import Any, Callable, NamedTuple
+
+from mymltoolkit.profiling import _collect, _merge, _trace_start
+
+__all__ = ("EXECUTORS", "SHARED_MEMORY_MIN_BYTES", "imap")
+
+EXECUTORS = ("thread", "process")
+
+# The function applied by a process worker, installed once per worker by `_initialize`
+_func: Callable[[Any], Any] | None = None
+
+# Arrays at least this large are passed to and from process workers through shared
+# memory
+SHARED_MEMORY_MIN_BYTES = 1 << 20
+
+
+def _check_executor(executor: str | None) -> None:
+    if executor is not None and executor not in EXECUTORS:
+        raise ValueError(
+            f"`executor` should be one of {', '.join(EXECUTORS)} or None, "
+            f"not {executor!r}"
+        )
+
+
+def _mp_context() -> Any:
+    # Forked workers inherit `func` (and whatever it references, e.g. the shared input
+    # of `agg`) from the parent's memory instead of receiving a pickled copy. Fork is
+    # only used where it is the default, and not while other threads run: a lock they
+    # hold (e.g. the profiler's) would stay locked forever in the child
+    context = multiprocessing.get_context()
+    if context.get_start_method() != "fork" or threading.active_count() == 1:
+        return context
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def _initialize(func: Callable[[Any], Any]) -> None:
+    global _func
+    _func = _unshare(func)
+
+
+#################
+# Shared memory #
+#################
+
+
+class _SharedArray(NamedTuple):
+    """An array stored in a file in shared memory, passed to another process by path"""
+
+    path: str
+
+
+class _SharedFrame(NamedTuple):
+    """A DataFrame whose columns (arrays or extension arrays) are passed separately"""
+
+    index: Any
+    columns: Any
+    values: list[Any]
+
+
+class _SharedPartial(NamedTuple):
+    """A `functools.partial` whose bound arguments are passed separately"""
+
+    func: Any
+    args: tuple
+    keywords: dict[str, Any]
+
+
+def _shm_directory() -> str:
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def _share(obj: Any, paths: list[str]) -> Any:
+    """`obj`, with large arrays (and DataFrame columns) moved to shared memory
+
+    The paths of the files created are appended to `paths`.
+    """
+    if type(obj) in (tuple, list):
+        return type(obj)(_share(item, paths) for item in obj)
+    if type(obj) is functools.partial:  # E.g. the input bound by `agg`
+        return _SharedPartial(
+            _share(obj.func, paths),
+            _share(obj.args, paths),
+            {key: _share(value, paths) for key, value in obj.keywords.items()},
+        )
+
+    module = type(obj).__module__
+    if module == "numpy":
+        import numpy as np
+
+        if (
+            isinstance(obj, np.ndarray)
+            and not obj.dtype.hasobject
+            and obj.nbytes >= SHARED_MEMORY_MIN_BYTES
+        ):
+            path = os.path.join(_shm_directory(), f"mymltoolkit-{uuid.uuid4().hex}.npy")
+            paths.append(path)
+            np.save(path, obj, allow_pickle=False)
+            return _SharedArray(path)
+    elif module.startswith("pandas") and type(obj).__name__ == "DataFrame":
+        if obj.memory_usage(index=False).sum() >= SHARED_MEMORY_MIN_BYTES:
+            import numpy as np
+
+            values = []
+            for i in range(obj.shape[1]):
+                column = obj.iloc[:, i]
+                if isinstance(column.dtype, np.dtype):
+                    values.append(_share(column.to_numpy(), paths))
+                else:  # Extension arrays (e.g. categoricals) are pickled
+                    values.append(column.array)
+            return _SharedFrame(obj.index, obj.columns, values)
+
+    return obj
+
+
+def _unshare(obj: Any, unlink: bool = False) -> Any:
+    """Rebuild objects passed by `_share` as copy-on-write views of shared memory
+
+    `unlink`: remove the files once mapped (when no other process will map them)
+    """
+    if type(obj) in (tuple, list):
+        return type(obj)(_unshare(item, unlink) for item in obj)
+    if type(obj) is _SharedPartial:
+        return functools.partial(
+            _unshare(obj.func, unlink),
+            *_unshare(obj.args, unlink),
+            **{key: _unshare(value, unlink) for key, value in obj.keywords.items()},
+        )
+
+    if type(obj) is _SharedArray:
+        import numpy as np
+
+        array = np.load(obj.path, mmap_mode="c", allow_pickle=False)
+        if unlink:
+            _unlink([obj.path])  # The mapping stays valid
+        return array
+    if type(obj) is _SharedFrame:
+        import pandas as pd
+
+        frame = pd.DataFrame(
+            dict(enumerate(_unshare(obj.values, unlink))), index=obj.index, copy=False
+        )
+        frame.columns = obj.columns
+        return frame
+
+    return obj
+
+
+def _unlink(paths: list[str]) -> None:
+    for path in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def _discard(future: Future) -> None:
+    """Remove the shared memory of a result that will not be used"""
+    if not future.cancelled() and future.exception() is None:
+        result = future.result()
+        if isinstance(result, tuple):
+            _unshare(result[0], unlink=True)
+
+
+#########
+# Pools #
+#########
+
+
+def _apply(func: Callable[[Any], Any], chunk: list[Any]) -> list[tuple[Any, float]]:
+    results = []
+    for item in chunk:
+        start = time.perf_counter()
+        result = func(item)
+        results.append((result, time.perf_counter() - start))
+
+    return results
+
+
+def _apply_installed(
+    chunk: list[Any], trace_start: float | None
+) -> tuple[list[tuple[Any, float]], list[dict[str, Any]] | None]:
+    # Trace events recorded in the worker are sent back to the parent (workers that
+    # were not forked do not have the parent's trace)
+    with _collect(trace_start) as events:
+        results = _apply(_func, _unshare(chunk))  # type: ignore
+    return _share(results, []), events
+
+
+def _result(future: Future) -> list[tuple[Any, float]]:
+    result = future.result()
+    if isinstance(result, tuple):  # From a process worker
+        result, events = result
+        _merge(events)
+        result = _unshare(result, unlink=True)
+    return result
+
+
+def _submit_shared(pool: Executor, chunk: list[Any]) -> Future:
+    paths: list[str] = []
+    try:
+        future = pool.submit(_apply_installed, _share(chunk, paths), _trace_start())
+    except BaseException:
+        _unlink(paths)
+        raise
+
+    # Inputs are no longer needed once the worker is done with them
+    future.add_done_callback(lambda _: _unlink(paths))
+    return future
+
+
+def _pool(
+    func: Callable[[Any], Any], executor: str, max_workers: int, paths: list[str]
+) -> tuple[Executor, Callable[[list[Any]], Future]]:
+    """A pool applying `func` and a function submitting a chunk to it
+
+    The paths of the shared memory files holding `func` are appended to `paths`, to
+    be removed once the pool is shut down.
+    """
+    if executor == "thread":
+        pool: Executor = ThreadPoolExecutor(max_workers)
+        # Run in a copy of the caller's context, so that e.g. profiling carries over
+        return pool, lambda chunk: pool.submit(
+            contextvars.copy_context().run, _apply, func, chunk
+        )
+
+    context = _mp_context()
+    if context.get_start_method() != "fork":  # Otherwise inherited, not pickled
+        func = _share(func, paths)
+    pool = ProcessPoolExecutor(
+        max_workers,
+        mp_context=context,
+        initializer=_initialize,
+        initargs=(func,),
+    )
+    return pool, functools.partial(_submit_shared, pool)
+
+
+def imap(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    *,
+    executor: str = "thread",
+    max_workers: int | None = None,
+    chunksize: int = 1,
+    ordered: bool = True,
+) -> Iterator[tuple[Any, float]]:
+    """Lazily apply `func` to each of `items` on a pool, yielding (result, wall time)
+
+    `executor`: "thread" or "process"
+    `max_workers`: number of workers (defaults to the number of CPUs, capped by the
+        number of chunks if `items` is a sequence)
+    `chunksize`: number of items sent to a worker at once
+    `ordered`: yield results in the order of `items` instead of as they complete
+
+    `func` is sent to each process worker only once. Chunks are pulled from a shared
+    queue by whichever worker is idle, so uneven items balance out across workers; only
+    a few chunks per worker are in flight at any time, so `items` may be a long lazy
+    iterable.
+
+    With processes, arrays and DataFrame columns of at least `SHARED_MEMORY_MIN_BYTES`
+    (in items, in results and, unless workers are forked, bound to `func` with
+    `functools.partial`) are written once to shared memory and mapped by the receiving
+    processes instead of being pickled through a pipe. Each file is removed as soon as
+    its receiver has mapped it (or, for items, once the chunk is done and, for `func`,
+    once the pool is shut down).
+    """
+    _check_executor(executor)
+    if chunksize < 1:
+        raise ValueError("`chunksize` should be at least 1")
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+        if isinstance(items, Sequence):
+            max_workers = max(1, min(max_workers, -(-len(items) // chunksize)))
+
+    chunks = _chunks(items, chunksize)
+    paths: list[str] = []
+    try:
+        pool, submit = _pool(func, executor, max_workers, paths)
+    except BaseException:
+        _unlink(paths)
+        raise
+    pending: deque[Future] = deque()
+
+    try:
+        for chunk in chunks:
+            pending.append(submit(chunk))
+            if len(pending) < 2 * max_workers:
+                continue
+
+            if ordered:
+                yield from _result(pending.popleft())
+            else:
+                yield from _completed(pending)
+
+        while pending:
+            if ordered:
+                yield from _result(pending.popleft())
+            else:
+                yield from _completed(pending)
+    finally:
+        for future in pending:
+            if not future.cancel():
+                future.add_done_callback(_discard)
+        pool.shutdown()
+        _unlink(paths)  # Every worker has mapped `func` by now
+
+
+def _chunks(items: Iterable[Any], chunksize: int) -> Iterator[list[Any]]:
+    iterator = iter(items)
+    chunk = list(islice(iterator, chunksize))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, chunksize))
+
+
+def _completed(pending: deque[Future]) -> Iterator[tuple[Any, float]]:
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        pending.remove(future)
+        yield from _result(future)
@@ -0,0 +1,323 @@
+"""Per-component profiling and tracing of task runs"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+__all__ = ("profile", "Profile", "ProfileNode", "trace", "Trace")
+
+# The node that spans started by the current thread or coroutine are attached to (None
+# when not profiling)
+_current: contextvars.ContextVar[ProfileNode | None] = contextvars.ContextVar(
+    "mymltoolkit_profile_node", default=None
+)
+# The trace that spans are recorded to (None when not tracing)
+_tracer: contextvars.ContextVar[Trace | None] = contextvars.ContextVar(
+    "mymltoolkit_trace", default=None
+)
+_lock = threading.Lock()
+
+
+@dataclass
+class ProfileNode:
+    """Aggregated timings of a component (or branch) at one position in the call tree"""
+
+    name: str
+    calls: int = 0
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    children: dict[str, ProfileNode] = field(default_factory=dict)
+
+    @property
+    def self_time(self) -> float:
+        """Wall time not spent in children"""
+        return self.wall_time - sum(child.wall_time for child in self.children.values())
+
+    def child(self, name: str) -> ProfileNode:
+        with _lock:
+            node = self.children.get(name)
+            if node is None:
+                node = self.children[name] = ProfileNode(name)
+            return node
+
+    def add(self, wall_time: float, cpu_time: float = 0.0) -> None:
+        with _lock:
+            self.calls += 1
+            self.wall_time += wall_time
+            self.cpu_time += cpu_time
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "children": [child.to_dict() for child in self.children.values()],
+        }
+
+
+class _Span:
+    __slots__ = ("node", "trace", "name", "args", "token", "wall", "cpu")
+
+    def __init__(
+        self,
+        parent: ProfileNode | None,
+        trace: Trace | None,
+        name: str,
+        args: dict[str, Any] | None,
+    ):
+        self.node = parent.child(name) if parent is not None else None
+        self.trace = trace
+        self.name = name
+        self.args = args
+
+    def __enter__(self) -> None:
+        if self.node is not None:
+            self.token = _current.set(self.node)
+        if self.trace is not None:
+            self.trace._event("B", self.name, self.args)
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        if self.trace is not None:
+            self.trace._event("E", self.name)
+        if self.node is not None:
+            self.node.add(wall, cpu)
+            _current.reset(self.token)
+
+
+class _NullSpan:
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _instrumented() -> bool:
+    """Whether spans are recorded (by `profile` or `trace`)"""
+    return _current.get() is not None or _tracer.get() is not None
+
+
+def _describe(inputs: Any) -> list[Any]:
+    items = inputs if isinstance(inputs, tuple) else (inputs,)
+    return [
+        list(item.shape) if hasattr(item, "shape") else type(item).__name__
+        for item in items
+    ]
+
+
+def _span(name: str, *args: Any, inputs: Any = None) -> _Span | _NullSpan:
+    """Time the enclosed code as a child of the current node (if profiling or tracing)
+
+    `name` is formatted with `args` only if needed. The shapes of `inputs` are added to
+    trace events.
+    """
+    parent = _current.get()
+    trace = _tracer.get()
+    if parent is None and trace is None:
+        return _NULL_SPAN
+
+    return _Span(
+        parent,
+        trace,
+        name.format(*args) if args else name,
+        {"inputs": _describe(inputs)}
+        if trace is not None and inputs is not None
+        else None,
+    )
+
+
+def _record(wall_time: float, name: str, *args: Any) -> None:
+    """Record a span measured elsewhere (e.g. in a worker process)"""
+    parent = _current.get()
+    if parent is not None:
+        parent.child(name.format(*args) if args else name).add(wall_time)
+
+
+def _trace_start() -> float | None:
+    """The start of the current trace (to pass to `_collect`), or None if not tracing"""
+    trace = _tracer.get()
+    return None if trace is None else trace.start
+
+
+@contextmanager
+def _collect(start: float | None) -> Iterator[list[dict[str, Any]] | None]:
+    """Collect the trace events of the enclosed block separately (e.g. in a worker)
+
+    `start`: the `_trace_start` of the trace the events are for (None if not tracing)
+    """
+    if start is None:
+        yield None
+        return
+
+    trace = Trace()
+    trace.start = start
+    token = _tracer.set(trace)
+    try:
+        yield trace.events
+    finally:
+        _tracer.reset(token)
+
+
+def _merge(events: list[dict[str, Any]] | None) -> None:
+    """Add events collected by `_collect` (e.g. sent back by a worker) to the trace"""
+    trace = _tracer.get()
+    if trace is not None and events:
+        trace.events.extend(events)
+
+
+class Profile:
+    """The result of profiling, as a tree of `ProfileNode`s under `root`
+
+    CPU time is process-wide, so it includes helper threads of a component but also any
+    branches running concurrently with it.
+    """
+
+    def __init__(self) -> None:
+        self.root = ProfileNode("profile")
+
+    def rows(self) -> list[dict[str, Any]]:
+        """The call tree as a flat table (in depth-first order)"""
+        rows: list[dict[str, Any]] = []
+
+        def visit(node: ProfileNode, path: tuple[str, ...]) -> None:
+            for child in node.children.values():
+                rows.append(
+                    {
+                        "path": " > ".join((*path, child.name)),
+                        "name": child.name,
+                        "depth": len(path),
+                        "calls": child.calls,
+                        "wall_time": child.wall_time,
+                        "cpu_time": child.cpu_time,
+                        "self_time": child.self_time,
+                    }
+                )
+                visit(child, (*path, child.name))
+
+        visit(self.root, ())
+        return rows
+
+    def to_dict(self) -> dict[str, Any]:
+        return self.root.to_dict()
+
+    def to_json(self, path: str | None = None, **kwargs: Any) -> str:
+        """Serialize the call tree (and write it to `path`, if specified)"""
+        text = json.dumps(self.to_dict(), **kwargs)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def to_dataframe(self) -> Any:
+        import pandas as pd
+
+        return pd.DataFrame(
+            self.rows(),
+            columns=[
+                "path",
+                "name",
+                "depth",
+                "calls",
+                "wall_time",
+                "cpu_time",
+                "self_time",
+            ],
+        )
+
+    def __str__(self) -> str:
+        return "\n".join(
+            f"{'  ' * row['depth']}{row['name']}: {row['calls']} calls, "
+            f"{row['wall_time']:.6f}s wall, {row['cpu_time']:.6f}s cpu"
+            for row in self.rows()
+        )
+
+
+@contextmanager
+def profile() -> Iterator[Profile]:
+    """Profile all task runs in the enclosed block
+
+    ```python
+    with profile() as report:
+        task(data)
+
+    print(report)
+    report.to_dataframe().sort_values("self_time")
+    ```
+    """
+    report = Profile()
+    token = _current.set(report.root)
+    try:
+        yield report
+    finally:
+        _current.reset(token)
+
+
+class Trace:
+    """Begin/end events of the components run while tracing
+
+    Export with `to_json` and load the file into Perfetto (https://ui.perfetto.dev) or
+    chrome://tracing. Events carry the process and thread ids of the workers that ran
+    them, and the shapes of the inputs of each stage.
+    """
+
+    def __init__(self) -> None:
+        self.events: list[dict[str, Any]] = []
+        self.start = time.perf_counter()
+
+    def _event(self, ph: str, name: str, args: dict[str, Any] | None = None) -> None:
+        event = {
+            "name": name,
+            "ph": ph,
+            "ts": (time.perf_counter() - self.start) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"traceEvents": self.events, "displayTimeUnit": "ms"}
+
+    def to_json(self, path: str | None = None, **kwargs: Any) -> str:
+        """Serialize in the Chrome Trace Event Format (and write it to `path`)"""
+        text = json.dumps(self.to_dict(), **kwargs)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+
+@contextmanager
+def trace() -> Iterator[Trace]:
+    """Trace all task runs in the enclosed block
+
+    ```python
+    with trace() as events:
+        task(data)
+
+    events.to_json("trace.json")
+    ```
+    """
+    events = Trace()
+    token = _tracer.set(events)
+    try:
+        yield events
+    finally:
+        _tracer.reset(token)
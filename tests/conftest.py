@@ -0,0 +1,19 @@
+import multiprocessing
+
+import pytest
+
+from mymltoolkit import parallel
+
+
+@pytest.fixture
+def executor(request, monkeypatch):
+    """`request.param`, with "forkserver" meaning process workers not started by fork
+
+    Process workers are forked where possible, which hides anything they cannot unpickle
+    """
+    if request.param != "forkserver":
+        return request.param
+
+    context = multiprocessing.get_context("forkserver")
+    monkeypatch.setattr(parallel, "_mp_context", lambda: context)
+    return "process"
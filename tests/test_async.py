@@ -0,0 +1,77 @@
+import asyncio
+
+from mymltoolkit import agg, each, multi
+from mymltoolkit.component import class_component, component
+
+
+@component
+async def sleep_and_add(a=None, *, delay=0.2, b=1, **extra):
+    await asyncio.sleep(delay)
+    return a + b
+
+
+@component
+async def meet(a=None, *, arrived, n, b=1, **extra):
+    """Add b to a once `n` calls sharing `arrived` have started (None after a second)"""
+    arrived.append(b)
+    for _ in range(1000):
+        if len(arrived) >= n:
+            return a + b
+        await asyncio.sleep(0.001)
+
+
+@component
+def double(a=None, **extra):
+    return a * 2
+
+
+@class_component
+class async_add:
+    def __init__(self, b=1):
+        self.b = b
+
+    async def __call__(self, a, **extra):
+        await asyncio.sleep(0)
+        return a + self.b
+
+    async def inverse(self, a, **extra):
+        return a - self.b
+
+
+def test_acall():
+    task = (sleep_and_add(delay=0) | double() | async_add(3)).to_task()
+
+    assert asyncio.run(task.acall(1)) == 7
+    assert task(1) == 7  # Coroutines are run to completion in synchronous calls
+    assert asyncio.run(task.ainverse(7)) == 4
+    assert task.inverse(7) == 4
+
+    supertask = (double() | task).to_task()
+    assert asyncio.run(supertask.acall(1)) == 9
+
+
+def test_call_in_running_loop():
+    task = (sleep_and_add(delay=0) | async_add(3)).to_task()
+
+    async def main():  # E.g. a notebook cell
+        return task(1), task.inverse(5)
+
+    assert asyncio.run(main()) == (5, 2)
+
+
+def test_meta_gather():
+    # Branches only finish once all of them have started, so they have to overlap
+    arrived = []
+    branches = [meet(arrived=arrived, n=4, b=i) for i in range(4)]
+    assert asyncio.run(agg(*branches).to_task().acall(1)) == (1, 2, 3, 4)
+
+    arrived = []
+    task = each(meet(arrived=arrived, n=3)).to_task()
+    assert asyncio.run(task.acall(1, 2, 3)) == (2, 3, 4)
+
+    arrived = []
+    task = multi(
+        meet(arrived=arrived, n=2), None, meet(arrived=arrived, n=2, b=2)
+    ).to_task()
+    assert asyncio.run(task.acall(1, 2, 3)) == (2, 2, 5)
+    assert asyncio.run(multi(None, async_add(2)).to_task().ainverse(1, 5)) == (1, 3)
@@ -0,0 +1,200 @@
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mymltoolkit.cache import DiskCache, fingerprint
+from mymltoolkit.component import component
+
+
+calls = []
+
+
+@component
+def scale(x=None, *, factor=2, **extra):
+    calls.append(factor)
+    return x * factor
+
+
+@component
+def shift(x=None, *, by=1, **extra):
+    calls.append(by)
+    return (x + by,)  # A 1-tuple, as arrays would be unpacked by the next stage
+
+
+def test_fingerprint():
+    df = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+
+    assert fingerprint(df) == fingerprint(df.copy())
+    assert fingerprint(df) != fingerprint(df.iloc[::-1])
+    assert fingerprint(np.arange(3)) != fingerprint(np.arange(3.0))
+    assert fingerprint(scale(factor=2)) == fingerprint(scale(factor=2))
+    assert fingerprint(scale(factor=2)) != fingerprint(scale(factor=3))
+
+    # Sets are hashed independently of their iteration order (i.e. of PYTHONHASHSEED)
+    script = (
+        "from mymltoolkit.cache import fingerprint; print(fingerprint({'a', 'b', 'c'}))"
+    )
+    digests = {
+        subprocess.run(
+            [sys.executable, "-c", script],
+            env={**os.environ, "PYTHONHASHSEED": seed},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for seed in ("1", "2", "3")
+    }
+    assert len(digests) == 1
+
+    Dynamic = type("Dynamic", (), {})  # No source code to hash
+    with pytest.warns(RuntimeWarning, match="source code"):
+        fingerprint(Dynamic)
+
+
+def test_disk_cache(tmp_path):
+    cache = DiskCache(tmp_path)
+    df = pd.DataFrame({"a": [1.0, 2.0], "b": ["x", "y"]})
+    array = np.arange(6).reshape(2, 3)
+
+    cache.put("key", (df, array, {"c": 1}))
+    loaded_df, loaded_array, loaded_dict = cache.get("key")
+
+    pd.testing.assert_frame_equal(loaded_df, df)
+    assert isinstance(loaded_array, np.memmap)
+    np.testing.assert_array_equal(loaded_array, array)
+    loaded_array += 1  # Copy-on-write: the cached entry is left alone
+    np.testing.assert_array_equal(cache.get("key")[1], array)
+    assert loaded_dict == {"c": 1}
+    assert "missing" not in cache
+
+
+def test_disk_cache_concurrent_puts(tmp_path):
+    cache = DiskCache(tmp_path)
+    array = np.arange(1000)
+    barrier = threading.Barrier(8)
+
+    def put():
+        barrier.wait()
+        for _ in range(20):
+            cache.put("key", array)
+
+    with ThreadPoolExecutor(8) as pool:
+        for future in [pool.submit(put) for _ in range(8)]:
+            future.result()  # Writers losing a race keep the other entry
+
+    np.testing.assert_array_equal(cache.get("key"), array)
+    assert os.listdir(tmp_path) == ["key"]  # No temporary directories are left
+
+
+def test_cached_component(tmp_path):
+    cache = DiskCache(tmp_path)
+    array = np.arange(10.0)
+    calls.clear()
+
+    for _ in range(2):
+        task = scale(factor=3).cached(cache).to_task()
+        np.testing.assert_array_equal(task(array), array * 3)
+
+    assert calls == [3]
+
+    scale(factor=4).cached(cache).to_task()(array)
+    assert calls == [3, 4]
+
+
+def test_disk_cache_eviction(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=3000)
+    for i in range(5):
+        cache.put(str(i), np.zeros(100))  # ~900 bytes each
+
+    assert [str(i) in cache for i in range(5)] == [False, False, True, True, True]
+
+
+def test_memoize():
+    array = np.arange(100.0)  # ~900 bytes per output
+    task = (shift(by=2) | shift(by=5)).to_task().memoize(max_bytes=2000)
+    calls.clear()
+
+    np.testing.assert_array_equal(task(array)[0], array + 7)
+    np.testing.assert_array_equal(task(array.copy())[0], array + 7)
+    assert calls == [2, 5]
+    assert (task.memo.hits, task.memo.misses, task.memo.evictions) == (2, 2, 0)
+
+    task(array + 1)  # Evicts both previous outputs
+    assert task.memo.evictions == 2
+    assert task.memo.nbytes <= 2000
+
+
+def test_memoize_identity():
+    array = np.arange(10.0)
+    task = scale(factor=7).to_task().memoize(max_bytes=10**6, key="identity")
+    calls.clear()
+
+    task(array)
+    task(array)
+    task(array.copy())
+
+    assert calls == [7, 7]
+    assert task.memo.info()["hits"] == 1
+    # The inputs the entries keep alive count against the budget
+    assert task.memo.info()["nbytes"] >= 4 * array.nbytes
+
+
+def test_checkpoint(tmp_path):
+    array = np.arange(10.0)
+    task = (shift(by=1) | shift(by=2) | scale(factor=3)).to_task()
+    calls.clear()
+
+    np.testing.assert_array_equal(task.run(array, checkpoint=tmp_path), (array + 3) * 3)
+    assert calls == [1, 2, 3]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["000", "001", "002"]
+
+    # Only the stages from the first modified one onwards are rerun
+    task = (shift(by=1) | shift(by=2) | scale(factor=4)).to_task()
+    output = task.run(array, checkpoint=tmp_path, resume=True)
+    np.testing.assert_array_equal(output, (array + 3) * 4)
+    assert calls == [1, 2, 3, 4]
+
+    # Other inputs invalidate every stage
+    task.run(array + 1, checkpoint=tmp_path, resume=True)
+    assert calls == [1, 2, 3, 4, 1, 2, 4]
+
+
+def test_incremental(tmp_path):
+    cache = DiskCache(tmp_path)
+    array = np.arange(10.0)
+    calls.clear()
+
+    def pipeline(by):
+        return (shift(by=1) | shift(by=by) | scale(factor=3)).to_task()
+
+    np.testing.assert_array_equal(pipeline(2).run(array, store=cache), (array + 3) * 3)
+    assert calls == [1, 2, 3]
+
+    # Only the modified stage and those downstream of it are rerun
+    np.testing.assert_array_equal(pipeline(5).run(array, store=cache), (array + 6) * 3)
+    assert calls == [1, 2, 3, 5, 3]
+
+    # Both variants are kept
+    pipeline(2).run(array, store=cache)
+    assert calls == [1, 2, 3, 5, 3]
+
+
+@component
+def bump(x=None, *, by=1, **extra):
+    x += by  # In place
+    return (x,)
+
+
+def test_incremental_in_place(tmp_path):
+    cache = DiskCache(tmp_path)
+    array = np.arange(10.0)
+
+    for by in (1, 2):  # The second run modifies the reused output of `shift`
+        task = (shift(by=1) | bump(by=by)).to_task()
+        np.testing.assert_array_equal(task.run(array, store=cache)[0], array + 1 + by)
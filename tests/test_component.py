@@ -1,8 +1,9 @@
+import threading
+
 import mymltoolkit as mlt
 from mymltoolkit.component import component, class_component, Component, Task
 from mymltoolkit import multi, agg, each
 
-
 import pytest
 
 
@@ -93,12 +94,35 @@ def test_component_list():
     assert isinstance(list1.to_task(), Task)
 
 
+def test_component_reuse():
+    shared = add(3)
+    task1 = (shared | subtract(1)).to_task()
+    task2 = (subtract(1) | shared | shared).to_task()
+
+    assert task1(0) == 2
+    assert task2(0) == 5
+    assert len(task2.components) == 3
+    assert task2.components[1] is task2.components[2] is shared
+    assert len(task1.components) == 2  # Joining did not modify the operands
+
+
 def test_task():
     task = Task(foo(c=3) | bar() | baz(), "quux", "More quux")
 
     assert task(1, 2) == 45
 
 
+def test_task_save_load(tmp_path):
+    task = Task(foo(c=4) | bar() | baz(), "quux")
+    task.save(tmp_path / "task.joblib")
+    foo(c=3).save(tmp_path / "foo.joblib")
+
+    loaded = Task.load(tmp_path / "task.joblib")
+    assert loaded(1, 2) == 45
+    assert str(loaded) == "task quux"
+    assert Component.load(tmp_path / "foo.joblib").to_task()(1, 2) == 6
+
+
 def test_subtask():
     task = Task(foo(c=3) | bar() | baz(), "quux", "More quux")
     supertask = (bar(6) | task).to_task("supertask")
@@ -171,3 +195,189 @@ def test_each():
     task = (two_and_three() | each(add())).to_task()
 
     assert task() == (4, 5)
+
+
+def test_columns():
+    np = pytest.importorskip("numpy")
+    pd = pytest.importorskip("pandas")
+
+    @component
+    def double(df=None, **extra):
+        return df * 2
+
+    @component
+    def total(df=None, **extra):
+        return df.sum(axis=1).rename("total")
+
+    df = pd.DataFrame({"a": [1, 2], "b": [3, 4], "c": [5.0, 6.0]})
+    doubled = mlt.columns(double(), ["a", "b"]).to_task()(df)
+
+    assert list(doubled.columns) == ["a", "b", "c"]  # Positions are kept
+    assert doubled["a"].tolist() == [2, 4]
+    assert df["a"].tolist() == [1, 2]  # The input is not modified
+
+    # Untouched columns are not copied (and with copy-on-write, writes to the result do
+    # not reach the input)
+    assert np.shares_memory(doubled["c"].to_numpy(), df["c"].to_numpy())
+    if int(pd.__version__.split(".")[0]) >= 3:
+        doubled.loc[0, "c"] = 99
+        doubled["c"] *= 0
+        assert df["c"].tolist() == [5.0, 6.0]
+
+    totals = mlt.columns(total(), "a").to_task()(df)  # A single label
+    assert list(totals.columns) == ["b", "c", "total"]
+    assert totals["total"].tolist() == [1, 2]
+
+    @component
+    def replace(df=None, **extra):  # Drops the first column, adds one
+        return (df.iloc[:, 1:] * 2).assign(total=df.sum(axis=1))
+
+    wide = pd.DataFrame(
+        np.arange(600).reshape(2, 300), columns=[f"c{i}" for i in range(300)]
+    )
+    for step in (1, 2):  # Runs of columns, or too many to keep as slices
+        selected = list(wide.columns[10:250:step])
+        result = mlt.columns(replace(), selected).to_task()(wide)
+
+        expected = wide.drop(columns=selected[0]).assign(
+            total=wide[selected].sum(axis=1)
+        )
+        expected.loc[:, selected[1:]] *= 2
+        assert result.equals(expected)
+
+    totals = mlt.columns(total(), ["a", "b"]).to_task()(df)
+    assert list(totals.columns) == ["c", "total"]
+    assert totals["total"].tolist() == [4, 6]
+
+
+def test_compile():
+    task = Task(foo(c=3) | bar() | baz(), "quux")
+    supertask = (bar(6) | task).to_task("supertask").compile()
+
+    assert isinstance(supertask._plan.forward, tuple)
+    assert len(supertask._plan.forward) == 4  # The subtask is inlined
+    assert task._plan is not None  # Subtasks are compiled as well
+    assert supertask() == 66
+    assert supertask.inverse(66) == 66
+
+
+def test_compile_nested():
+    task = Task(add(1) | subtract(3), "quux")
+    for i in range(7):
+        task = (add(i) | task).to_task("supertask")
+    task.compile()
+
+    assert len(task._plan.forward) == 9
+    assert max(step.depth for step in task._plan.forward) == 7
+    assert task(0) == 19
+    assert task.inverse(19) == 0
+
+    memoized = (add() | Task(add() | add()).memoize(1 << 20)).to_task().compile()
+    assert len(memoized._plan.forward) == 2  # Subtasks with a memo are not inlined
+
+
+def test_logging_level():
+    from loguru import logger
+    from mymltoolkit.component import _set_logging_level
+
+    messages = []
+    handler = logger.add(messages.append, format="{message}")
+    task = Task(foo(c=3) | bar() | baz(), "quux")
+    supertask = (bar(6) | task).to_task("supertask")
+
+    try:
+        _set_logging_level(None)
+        assert supertask() == 66
+        assert messages == []
+
+        _set_logging_level(0)
+        assert supertask() == 66
+        assert [m.strip() for m in messages] == [
+            "Running bar: Divide a by 2, 42",
+            "Running subtask quux",
+        ]
+    finally:
+        _set_logging_level(-1)
+        logger.remove(handler)
+
+
+@pytest.mark.parametrize("executor", ["thread", "process", "forkserver"], indirect=True)
+def test_aggregate_executor(executor):
+    task = (
+        two_and_three()
+        | agg(product(), quotient(), baz(), executor=executor, max_workers=2)
+    ).to_task()
+
+    assert task() == (6, 2 / 3, 5)
+
+    with pytest.raises(ValueError):
+        agg(product(), executor="gpu")
+
+
+@pytest.mark.parametrize("executor", ["thread", "process", "forkserver"], indirect=True)
+def test_each_executor(executor):
+    task = each(add(), executor=executor, max_workers=2, chunksize=3).to_task()
+
+    assert task(*range(10)) == tuple(range(2, 12))
+
+
+def test_each_straggler():
+    done = threading.Event()
+
+    @component
+    def wait(x=None, **extra):
+        if x == 0:  # Runs until the last item is done (False after 10s)
+            return done.wait(timeout=10)
+        if x == 40:
+            done.set()
+        return x
+
+    task = each(wait(), executor="thread", max_workers=2).to_task()
+
+    # The other worker gets through the rest while the first item runs, instead of
+    # stalling once a few chunks are pending
+    assert task(*range(41)) == (True, *range(1, 41))  # In order
+
+
+@pytest.mark.parametrize("executor", ["thread", "process", "forkserver"], indirect=True)
+def test_multicomponent_executor(executor):
+    component = multi(add(3), None, subtract(6), executor=executor)
+    instance = component.func.__self__
+
+    assert component.to_task()(5, 6, 7) == (8, 6, 1)
+    assert instance.wall_times[1] is None
+    assert all(t >= 0 for t in instance.wall_times[::2])
+    assert component.inverse_func(8, 6, 1) == (5, 6, 7)
+
+
+def test_stream():
+    task = (add(3) | subtract(1)).to_task()
+    consumed = []
+
+    def chunks():
+        for i in range(3):
+            consumed.append(i)
+            yield i
+
+    results = task.stream(chunks())
+    assert consumed == []
+    assert next(results) == 2
+    assert consumed == [0]
+    assert list(results) == [3, 4]
+
+    assert list(Task(foo(c=0) | bar()).stream([(1, 2), (3, 4)])) == [(1, 42), (3, 42)]
+    assert list(task.stream([2, 3], inverse=True)) == [0, 1]
+
+
+@pytest.mark.parametrize(
+    "executor", [None, "thread", "process", "forkserver"], indirect=True
+)
+def test_map(executor):
+    task = (add(3) | subtract(1)).to_task()
+    results = task.map(range(20), executor=executor, max_workers=2, chunksize=3)
+
+    assert next(results) == 2
+    assert list(results) == list(range(3, 22))
+    assert sorted(
+        task.map(range(20), executor=executor, ordered=False, max_workers=2)
+    ) == list(range(2, 22))
@@ -0,0 +1,79 @@
+import threading
+import weakref
+
+import numpy as np
+import pytest
+
+from mymltoolkit.component import component
+from mymltoolkit.dag import DAG
+
+
+@component
+def split(a=None, **extra):
+    return a[:2], a[2:]
+
+
+@component
+def total(a=None, **extra):
+    return a.sum()
+
+
+@component
+def difference(a=None, b=None, **extra):
+    return a - b
+
+
+def test_dag():
+    dag = DAG(inputs=["data"], outputs=["difference", "head_total"])
+    dag.add("split", split(), inputs="data", outputs=["head", "tail"])
+    dag.add("head_total", total(), inputs="head")
+    dag.add("tail_total", total(), inputs="tail")
+    dag.add("difference", difference(), inputs=["tail_total", "head_total"])
+
+    data = np.arange(5)
+    assert dag(data) == (9 - 1, 1)
+    assert (dag.as_component() | difference()).to_task()(data) == 7
+
+    with pytest.raises(ValueError):
+        dag.add("oops", total(), inputs="undefined")
+    with pytest.raises(ValueError):
+        dag.add("split", total(), inputs="data")
+
+
+def test_dag_concurrency():
+    barrier = threading.Barrier(2, timeout=5)
+
+    @component
+    def wait(a=None, **extra):
+        barrier.wait()  # Deadlocks unless both branches run concurrently
+        return a
+
+    dag = DAG(inputs=["x"], outputs=["a", "b"], max_workers=2)
+    dag.add("a", wait(), inputs="x")
+    dag.add("b", wait(), inputs="x")
+
+    assert dag(1) == (1, 1)
+
+
+@pytest.mark.parametrize("max_workers", [1, None])
+def test_dag_release(max_workers):
+    refs = []
+
+    @component
+    def produce(**extra):
+        array = np.ones(10)
+        refs.append(weakref.ref(array))
+        return array
+
+    @component
+    def check(a=None, **extra):
+        return refs[0]() is None  # The output of produce is no longer referenced
+
+    dag = DAG(outputs=["released"], max_workers=max_workers)
+    dag.add("produced", produce())
+    dag.add(
+        "incremented", component(lambda a=None, **extra: a + 1)(), inputs="produced"
+    )
+    dag.add("released", check(), inputs="incremented")
+
+    assert dag() is True
@@ -0,0 +1,61 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from mymltoolkit.component import component
+from mymltoolkit.memory import Spiller, rss
+
+
+seen = []
+
+
+@component
+def scale(x=None, *, factor=2, **extra):
+    seen.append(type(x))
+    return (x * factor,)  # A 1-tuple, as arrays would be unpacked by the next stage
+
+
+def test_rss():
+    if os.path.exists("/proc/self/statm"):
+        assert rss() > 0
+
+
+def test_spiller(tmp_path):
+    array = np.arange(1000.0)
+    df = pd.DataFrame({"a": array, "b": array.astype(int), "c": ["x"] * 1000})
+
+    with Spiller(max_rss=0, directory=tmp_path, min_bytes=1000) as spiller:
+        spilled_array, spilled_df, small = spiller((array, df, np.arange(3.0)))
+
+        assert isinstance(spilled_array, np.memmap)
+        np.testing.assert_array_equal(spilled_array, array)
+        assert spilled_df.equals(df)
+        assert isinstance(small, np.ndarray) and not isinstance(small, np.memmap)
+        assert spiller.spilled == 3  # The array and the numeric columns
+        assert spiller(array) is not array
+
+        spilled_array += 1  # Copy-on-write
+        np.testing.assert_array_equal(np.load(spilled_array.filename), array)
+
+    assert list(tmp_path.iterdir()) == []
+    with Spiller(max_rss=1 << 60) as spiller:
+        assert spiller(array) is array
+
+
+def test_spill_directory(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setattr(sys, "platform", "linux")
+
+    with Spiller(max_rss=0) as spiller:
+        assert os.path.dirname(spiller.directory) == str(tmp_path / "mymltoolkit")
+
+
+def test_run_max_memory():
+    array = np.arange(1 << 18, dtype=float)  # 2 MiB
+    task = (scale(factor=2) | scale(factor=3) | scale(factor=4)).to_task()
+    seen.clear()
+
+    np.testing.assert_array_equal(task.run(array, max_memory=0)[0], array * 24)
+    assert seen == [np.ndarray, np.memmap, np.memmap]  # Intermediates were spilled
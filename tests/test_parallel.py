@@ -0,0 +1,100 @@
+import glob
+import multiprocessing
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mymltoolkit import agg, parallel
+from mymltoolkit.component import component
+from mymltoolkit.parallel import _mp_context, _shm_directory, imap
+
+
+def leftovers():
+    return glob.glob(f"{_shm_directory()}/mymltoolkit-*")
+
+
+def double(x):
+    return x * 2
+
+
+@component
+def total(x=None, **extra):
+    return float(x.sum())
+
+
+@component
+def maximum(x=None, **extra):
+    return float(x.max())
+
+
+def test_shared_memory():
+    before = leftovers()
+    array = np.arange(1 << 18, dtype=float)  # 2 MiB
+    df = pd.DataFrame({"a": array, "b": array.astype(int), "c": ["x"] * len(array)})
+
+    results = [result for result, _ in imap(double, [array, df, 3], executor="process")]
+
+    assert isinstance(results[0], np.memmap)
+    np.testing.assert_array_equal(results[0], array * 2)
+    results[0][0] = -1  # Copy-on-write views are writable
+    assert results[1].equals(df * 2)
+    assert results[2] == 6
+    assert leftovers() == before
+
+
+def identity(x):
+    return x
+
+
+def test_shared_memory_dtypes():
+    before = leftovers()
+    array = np.arange(1 << 18, dtype=float)
+    df = pd.DataFrame(
+        {
+            "a": array,
+            "b": pd.Categorical(["x", "y"] * (len(array) // 2)),
+            "c": pd.array(np.arange(len(array)), dtype="Int64"),
+        }
+    )
+
+    ((result, _),) = imap(identity, [df], executor="process")
+
+    assert result.dtypes.equals(df.dtypes)  # Extension dtypes are kept
+    assert result.equals(df)
+    assert leftovers() == before
+
+
+@component
+def kind(x=None, **extra):
+    return type(x).__name__
+
+
+@pytest.mark.parametrize("executor", ["process", "forkserver"], indirect=True)
+def test_shared_memory_agg(executor):
+    before = leftovers()
+    array = np.arange(1 << 18, dtype=float)
+    task = agg(total(), maximum(), kind(), executor=executor).to_task()
+
+    # Forked workers inherit the input, others map it from shared memory
+    fork = parallel._mp_context().get_start_method() == "fork"
+    assert task(array) == (array.sum(), array.max(), "ndarray" if fork else "memmap")
+    assert leftovers() == before
+
+
+def test_no_fork_with_threads():
+    default = multiprocessing.get_context().get_start_method()
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    try:
+        assert _mp_context().get_start_method() != "fork"
+        # Components are pickled (by reference) instead of inherited
+        task = agg(total(), maximum(), executor="process").to_task()
+        assert task(np.arange(4.0)) == (6.0, 3.0)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert _mp_context().get_start_method() == default
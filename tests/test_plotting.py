@@ -1,5 +1,9 @@
 import mymltoolkit as mlt
 import pandas as pd
+import pytest
+
+from mymltoolkit.memory import rss
+from mymltoolkit.plotting import render_batch
 
 
 def test_plotting():
@@ -11,3 +15,53 @@ def test_plotting():
         index=[0, 1, 2],
     )
     _line = mlt.lineplot().func(linedf)
+
+
+def test_lazy_imports():
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, mymltoolkit, mymltoolkit.component;"
+        "print(sorted({m.split('.')[0] for m in sys.modules}"
+        " & {'seaborn', 'matplotlib', 'sklearn', 'scipy', 'pandas'}))"
+    )
+    assert subprocess.check_output([sys.executable, "-c", code], text=True) == "[]\n"
+
+    import seaborn
+
+    assert mlt.residplot.__wrapped__ is seaborn.residplot
+    assert "histplot" in dir(mlt)
+
+
+@pytest.mark.parametrize("executor", [None, "process", "forkserver"], indirect=True)
+def test_render_batch(tmp_path, executor):
+    import matplotlib.pyplot as plt
+
+    df = pd.DataFrame({"a": [0, 1, 2, 3], "b": [1, 3, 2, 5]})
+    jobs = [(mlt.histplot(x=column), df) for column in df.columns]
+    jobs[1] = (mlt.histplot(x="b").to_task(), df)  # Tasks of a single component
+    jobs.append((mlt.scatterplot(x="a", y="b"), df))
+    jobs.append((mlt.pairplot(), df))  # Figure-level
+    figures = plt.get_fignums()
+
+    report = render_batch(jobs, tmp_path, format="svg", executor=executor)
+
+    assert [path.name for path in report.paths] == [
+        "0000-histplot.svg",
+        "0001-histplot.svg",
+        "0002-scatterplot.svg",
+        "0003-pairplot.svg",
+    ]
+    assert all(path.stat().st_size > 0 for path in report.paths)
+    assert plt.get_fignums() == figures  # Figures are closed
+    assert report.throughput > 0
+    assert "4 figures" in str(report)
+    if report.peak_rss is not None:  # Not counting the pages shared with the parent
+        assert 0 <= report.peak_rss < rss()
+
+    with pytest.raises(ValueError):
+        render_batch(jobs, tmp_path, executor="thread")
+    with pytest.raises(TypeError):
+        task = (mlt.histplot(x="a") | mlt.histplot(x="b")).to_task()
+        render_batch([(task, df)], tmp_path, executor=executor)
@@ -0,0 +1,84 @@
+import json
+import time
+
+import pytest
+
+from mymltoolkit import agg, each
+from mymltoolkit.component import component
+from mymltoolkit.profiling import profile
+
+
+@component
+def nap(a=None, *, seconds=0.01, **extra):
+    time.sleep(seconds)
+    return a
+
+
+@component
+def pair(a=None, b=None, **extra):
+    return a, b
+
+
+def test_profile():
+    inner = (nap() | nap(seconds=0.02)).to_task("inner")
+    task = (nap() | inner | each(nap())).to_task()
+
+    with profile() as report:
+        task(1)
+        task(2)
+
+    rows = {row["path"]: row for row in report.rows()}
+    assert rows["nap"]["calls"] == 2
+    assert rows["subtask inner"]["wall_time"] >= 2 * 0.03
+    assert rows["subtask inner > nap"]["calls"] == 4  # Both stages named nap
+    assert rows["each: Apply a transformation on each of the arguments > task"]["calls"]
+
+    df = report.to_dataframe()
+    assert len(df) == len(rows)
+    assert (df["wall_time"] >= df["self_time"] - 1e-9).all()
+    assert json.loads(report.to_json())["children"][0]["name"] == "nap"
+
+    task(3)  # Not profiled
+    assert rows["nap"]["calls"] == 2
+
+
+@pytest.mark.parametrize("executor", [None, "thread", "process"])
+def test_profile_branches(executor):
+    task = agg(nap(), nap(), executor=executor).to_task()
+
+    with profile() as report:
+        task(1)
+
+    paths = [row["path"] for row in report.rows()]
+    assert (
+        "agg: Aggregate multiple transformations over the same input > task 0" in paths
+    )
+    assert (
+        "agg: Aggregate multiple transformations over the same input > task 1" in paths
+    )
+
+
+@pytest.mark.parametrize("executor", ["thread", "process", "forkserver"], indirect=True)
+def test_trace(executor, tmp_path):
+    import os
+
+    import numpy as np
+
+    from mymltoolkit.profiling import trace
+
+    task = (pair() | each(nap(), executor=executor, max_workers=2)).to_task()
+
+    with trace() as events:
+        task(np.zeros((3, 2)), np.zeros(4))
+
+    path = tmp_path / "trace.json"
+    events.to_json(str(path))
+    loaded = json.loads(path.read_text())["traceEvents"]
+
+    begins = [e for e in loaded if e["ph"] == "B"]
+    assert len(begins) == len([e for e in loaded if e["ph"] == "E"])
+    assert begins[0]["name"] == "pair"
+    assert begins[0]["args"] == {"inputs": [[3, 2], [4]]}
+
+    workers = {(e["pid"], e["tid"]) for e in begins if e["name"] == "task"}
+    assert workers and (os.getpid(), begins[0]["tid"]) not in workers
@@ -0,0 +1,114 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import FunctionTransformer, StandardScaler
+
+from mymltoolkit.component import Component, Task, class_component, sklearn_component
+
+
+StandardScalerComponent = sklearn_component(StandardScaler)
+LinearRegressionComponent = sklearn_component(LinearRegression)
+
+
+@class_component
+class offset:
+    def __init__(self, by=1):
+        self.by = by
+
+    def __call__(self, train=None, test=None, **extra):
+        return (
+            train + self.by if train is not None else None,
+            test + self.by if test is not None else None,
+        )
+
+
+def test_sklearn_component():
+    train, test = np.arange(8.0).reshape(4, 2), np.ones((2, 2))
+    task = StandardScalerComponent().to_task()
+
+    scaled_train, scaled_test = task(train, test)
+    assert np.allclose(scaled_train.mean(axis=0), 0)
+    assert np.allclose(task.inverse(scaled_train, scaled_test)[1], test)
+    assert task(None, test)[0] is None
+
+
+def test_save_load(tmp_path):
+    rng = np.random.default_rng(0)
+    train, test = rng.random((100, 4)), rng.random((10, 4))
+    task = (offset(2) | StandardScalerComponent()).to_task("scale")
+    expected = task(train, test)[1]
+
+    task.save(tmp_path / "task.joblib")
+    loaded = Task.load(tmp_path / "task.joblib")
+
+    estimator = loaded.components[1].func.estimator
+    assert isinstance(estimator.mean_, np.memmap)  # Fitted arrays are memory-mapped
+    assert np.allclose(loaded(None, test)[1], expected)
+    assert str(loaded) == "task scale"
+
+    component = LinearRegressionComponent()
+    component.func.estimator.fit(train, train @ np.arange(4.0))
+    component.save(tmp_path / "model.joblib")
+    loaded_component = Component.load(tmp_path / "model.joblib", mmap_mode=None)
+    assert np.allclose(loaded_component.func(None, test)[1], test @ np.arange(4.0))
+
+
+class Scale:
+    def __init__(self, by=2):
+        self.by = by
+
+    def __call__(self, x=None, **extra):
+        return x * self.by
+
+
+ScaleComponent = class_component(Scale)
+class_component(Scale)  # Wrapping twice is harmless
+
+
+def test_pickle_class_component():
+    task = offset(3).to_task()
+    assert pickle.loads(pickle.dumps(task))(1, None) == (4, None)
+
+    assert pickle.loads(pickle.dumps(Scale(3))).by == 3  # The class is left alone
+    assert Scale.__qualname__ == "Scale"
+    assert pickle.loads(pickle.dumps(ScaleComponent(3).to_task()))(2) == 6
+
+
+def mixed(x):
+    return pd.DataFrame({"a": x[:, 0], "b": (x[:, 1] > 0.5).astype(int)})
+
+
+@pytest.mark.parametrize(
+    "executor", [None, "thread", "process", "forkserver"], indirect=True
+)
+def test_batch_size(executor):
+    rng = np.random.default_rng(0)
+    train, test = rng.random((100, 3)), rng.random((250, 3))
+    expected = StandardScaler().fit(train).transform(test)
+
+    batched = sklearn_component(StandardScaler, batch_size=64, executor=executor)
+    task = batched().to_task()
+    assert np.allclose(task(train, test)[1], expected)
+    assert np.allclose(task.inverse(None, task(None, test)[1])[1], test)
+
+    scaler = StandardScaler().set_output(transform="pandas")
+    frame = pd.DataFrame(test, columns=["a", "b", "c"], index=range(250, 500))
+    component = batched()
+    component.func.estimator = scaler.fit(pd.DataFrame(train, columns=["a", "b", "c"]))
+    output = component.func(None, frame)[1]
+    assert list(output.columns) == ["a", "b", "c"]
+    assert output.index.equals(frame.index)
+    assert np.allclose(output, expected)
+
+    component.func.estimator = scaler.fit(train)  # Array input, DataFrame output
+    output = component.func(None, test)[1]
+    assert output.index.equals(pd.RangeIndex(250))
+    assert np.allclose(output, expected)
+
+    component.func.estimator = FunctionTransformer(mixed).fit(train)
+    output = component.func(None, test)[1]
+    assert list(output.dtypes) == [np.float64, np.int64]  # Not object
+    assert output.equals(mixed(test))